@@ -0,0 +1,77 @@
+"""
+Wall time and errors of stopping many experiments (what bstop does) against a local gRPC stand-in
+that slows down past `--capacity` concurrent writes and rejects calls past twice that: the old
+serial loop with its 20s pause every 200, a fixed pool of 64 workers, and the AIMD executor,
+each looking the workload up before canceling it, then AIMD canceling by ID alone.
+
+    python -m benchmarks.bench_bulk_actions --experiments 1000 --capacity 16 --latency 0.02
+"""
+import argparse
+import os
+import tempfile
+import time
+
+# Keep the benchmark's name resolutions out of the real cache
+os.environ.setdefault("CUVETTE_CACHE_DIR", tempfile.mkdtemp(prefix="cuvette-bench-"))
+
+from benchmarks.standin import StandInGrpcServer  # noqa: E402
+from cuvette.utils.bulk import AIMDLimiter, BulkExecutor  # noqa: E402
+
+BREATHER_EVERY, BREATHER = 200, 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--experiments", type=int, default=1000, help="Experiments to stop")
+    parser.add_argument("--capacity", type=int, default=16, help="Concurrent writes the stand-in serves at full speed")
+    parser.add_argument("--latency", type=float, default=0.02, help="Artificial per-RPC latency (s)")
+    args = parser.parse_args()
+
+    with StandInGrpcServer(num_experiments=args.experiments, latency=args.latency, capacity=args.capacity) as server:
+        beaker = server.client()
+        ids = [experiment.id for experiment in server.experiments]
+
+        def stop(experiment_id: str):
+            workload = beaker.workload.get(experiment_id)
+            beaker.workload.cancel(workload)
+
+        def stop_by_id(experiment_id: str):
+            beaker.workload.cancel(experiment_id)
+
+        print(
+            f"{'':>22}  {'time':>8}  {'stopped/s':>9}  {'RPCs':>5}  {'failed':>6}  {'overloads':>9}  {'concurrency':>11}"
+        )
+
+        # The old loop, its pauses added up rather than slept through
+        server.reset()
+        start = time.perf_counter()
+        for experiment_id in ids:
+            stop(experiment_id)
+        elapsed = time.perf_counter() - start + (len(ids) // BREATHER_EVERY) * BREATHER
+        print(
+            f"{'serial + 20s pauses':>22}  {elapsed:>7.2f}s  {len(server.canceled) / elapsed:>9.1f}  "
+            f"{server.num_requests:>5}  {0:>6}  {0:>9}  {1:>11}"
+        )
+
+        runs = [
+            ("fixed 64 workers", stop, AIMDLimiter(initial=64, minimum=64, maximum=64)),
+            ("AIMD", stop, AIMDLimiter()),
+            ("AIMD, cancel by ID", stop_by_id, AIMDLimiter()),
+        ]
+        for name, action, limiter in runs:
+            server.reset()
+            executor = BulkExecutor(action, limiter=limiter, backoff_base=0.05, report_every=None)
+            start = time.perf_counter()
+            for _ in executor.run(ids):
+                pass
+            elapsed = time.perf_counter() - start
+            print(
+                f"{name:>22}  {elapsed:>7.2f}s  {len(server.canceled) / elapsed:>9.1f}  {server.num_requests:>5}  "
+                f"{executor.failed:>6}  "
+                f"{executor.overloads:>9}  {int(limiter.limit):>11}"
+            )
+        beaker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Startup and per-call latency of a fresh Beaker client per call site (config read, new gRPC
+channel, connect) vs. the shared client from cuvette.utils.clients, against a local gRPC stand-in.
+The stand-in is plaintext, so the TLS handshake a real channel pays is not counted here.
+
+    python -m benchmarks.bench_client_registry --calls 200 --threads 8
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Keep the benchmark's name resolutions out of the real cache, and let Config.from_env() find a token
+os.environ.setdefault("CUVETTE_CACHE_DIR", tempfile.mkdtemp(prefix="cuvette-bench-"))
+os.environ.setdefault("BEAKER_TOKEN", "benchmark")
+
+import grpc  # noqa: E402
+from beaker import Beaker, beaker_pb2_grpc  # noqa: E402
+from beaker import beaker_pb2 as pb2  # noqa: E402
+from beaker.config import Config  # noqa: E402
+
+from benchmarks.standin import StandInGrpcServer  # noqa: E402
+from cuvette.utils.clients import close_beaker, get_beaker, set_beaker  # noqa: E402
+
+
+def fresh_client(server: StandInGrpcServer) -> Beaker:
+    """What every Beaker.from_env() call used to cost, pointed at the stand-in"""
+    beaker = Beaker(Config.from_env(default_org="ai2"), check_for_upgrades=False)
+    beaker._channel = grpc.insecure_channel(f"127.0.0.1:{server.port}")
+    beaker._service = beaker_pb2_grpc.BeakerStub(beaker._channel)
+    return beaker
+
+
+def call(beaker: Beaker):
+    beaker.service.GetUser(pb2.GetUserRequest(user_id="davidh"))
+
+
+def per_call_site(server: StandInGrpcServer) -> float:
+    start = time.perf_counter()
+    beaker = fresh_client(server)
+    call(beaker)
+    beaker.close()
+    return time.perf_counter() - start
+
+
+def shared(server: StandInGrpcServer) -> float:
+    start = time.perf_counter()
+    call(get_beaker())
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200, help="Calls, each from its own call site")
+    parser.add_argument("--threads", type=int, default=8, help="Threads making calls, like download_job")
+    parser.add_argument("--latency", type=float, default=0.005, help="Artificial per-RPC latency (s)")
+    args = parser.parse_args()
+
+    with StandInGrpcServer(num_experiments=1, latency=args.latency) as server:
+        # Startup: the first RPC of a command, from a cold client vs. from the already connected shared client
+        start = time.perf_counter()
+        call(fresh_client(server))
+        cold = time.perf_counter() - start
+        set_beaker(server.client())
+        time.sleep(0.05)  # the channel connects in the background while the command parses its args
+        warm = shared(server)
+
+        print(f"{'':>16}  {'first call':>10}  {'p50':>8}  {'p95':>8}  {f'{args.calls} calls':>10}  {'threaded':>9}")
+        for name, fn, first in [("client per call", per_call_site, cold), ("shared client", shared, warm)]:
+            latencies = [fn(server) for _ in range(args.calls)]
+            start = time.perf_counter()
+            with ThreadPoolExecutor(args.threads) as pool:
+                list(pool.map(lambda _: fn(server), range(args.calls)))
+            threaded = time.perf_counter() - start
+            quantiles = statistics.quantiles(latencies, n=20)
+            print(
+                f"{name:>16}  {first * 1000:>8.2f}ms  {quantiles[9] * 1000:>6.2f}ms  {quantiles[18] * 1000:>6.2f}ms  "
+                f"{sum(latencies):>9.2f}s  {threaded:>8.2f}s"
+            )
+        close_beaker()
+
+
+if __name__ == "__main__":
+    main()
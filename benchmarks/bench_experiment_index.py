@@ -0,0 +1,64 @@
+"""
+Wall time and RPCs of gather_experiments crawling a workspace vs. delta-syncing the local
+experiment index, against a local gRPC stand-in.
+
+    python -m benchmarks.bench_experiment_index --sizes 1000 5000 --new 10 --active 20
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+# Keep the benchmark's index and name resolutions out of the real cache
+os.environ.setdefault("CUVETTE_CACHE_DIR", tempfile.mkdtemp(prefix="cuvette-bench-"))
+
+from benchmarks.standin import StandInGrpcServer  # noqa: E402
+from cuvette.utils.general import gather_experiments  # noqa: E402
+
+
+def timed_gather(server: StandInGrpcServer, workspace: str, limit: int, **kwargs):
+    server.reset()
+    beaker = server.client()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        experiments = gather_experiments(["davidh"], workspace, limit=limit, beaker=beaker, **kwargs)
+    elapsed = time.perf_counter() - start
+    beaker.close()
+    return experiments, elapsed, server.num_requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000], help="Experiments in the workspace")
+    parser.add_argument("--new", type=int, default=10, help="Experiments submitted between two runs")
+    parser.add_argument("--active", type=int, default=20, help="Experiments with jobs still running")
+    parser.add_argument("--latency", type=float, default=0.005, help="Artificial per-RPC latency (s)")
+    args = parser.parse_args()
+
+    print(f"{'experiments':>11}  {'crawl':>14}  {'first sync':>14}  {'delta sync':>14}  {'offline':>8}")
+    for size in args.sizes:
+        workspace = f"ai2/benchmark-{size}"
+        with StandInGrpcServer(num_experiments=size, active=args.active, latency=args.latency) as server:
+            _, crawl, crawl_rpcs = timed_gather(server, workspace, size, use_index=False)
+            _, first, first_rpcs = timed_gather(server, workspace, size)
+
+            server.add_experiments(args.new)
+            experiments, delta, delta_rpcs = timed_gather(server, workspace, size + args.new)
+            assert len(experiments) == size + args.new
+            assert experiments[0].id == server.experiments[0].id
+
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                gather_experiments(["davidh"], workspace, limit=size + args.new, offline=True)
+            offline = time.perf_counter() - start
+
+        print(
+            f"{size:>11}  {crawl:>6.2f}s {crawl_rpcs:>5} RPCs  {first:>6.2f}s {first_rpcs:>5} RPCs  "
+            f"{delta:>6.2f}s {delta_rpcs:>5} RPCs  {offline:>7.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Wall time of gather_experiments against a local gRPC stand-in, serial (as it used to be) vs. the
+concurrent job fetching, and how soon iter_experiments yields its first experiment.
+
+    python -m benchmarks.bench_gather_experiments --sizes 100 1000 5000 --latency 0.005
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+# Keep the benchmark's name resolutions out of the real cache
+os.environ.setdefault("CUVETTE_CACHE_DIR", tempfile.mkdtemp(prefix="cuvette-bench-"))
+
+from beaker import Beaker, BeakerWorkloadType  # noqa: E402
+
+from benchmarks.standin import StandInGrpcServer  # noqa: E402
+from cuvette.utils.general import gather_experiments, iter_experiments  # noqa: E402
+
+
+def serial_gather(beaker: Beaker, author: str, workspace_name: str, limit: int) -> int:
+    """The old loop: one job.list per task, one experiment at a time"""
+    workspace = beaker.workspace.get(workspace_name)
+    user = beaker.user.get(author)
+    num_jobs = 0
+    for workload in beaker.workload.list(
+        workspace=workspace, author=user, workload_type=BeakerWorkloadType.experiment, limit=limit
+    ):
+        for task in workload.experiment.tasks:
+            num_jobs += len(list(beaker.job.list(task=task)))
+    return num_jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000], help="Experiments in the workspace")
+    parser.add_argument("--tasks", type=int, default=1, help="Tasks per experiment")
+    parser.add_argument("--latency", type=float, default=0.005, help="Artificial per-RPC latency (s)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent job.list calls")
+    parser.add_argument("--skip-serial", action="store_true", help="Only time the concurrent version")
+    args = parser.parse_args()
+
+    print(f"{'experiments':>11}  {'serial':>9}  {'RPCs':>6}  {'concurrent':>10}  {'RPCs':>6}  {'speedup':>7}  {'first':>7}")
+    for size in args.sizes:
+        with StandInGrpcServer(num_experiments=size, tasks_per_experiment=args.tasks, latency=args.latency) as server:
+            serial = serial_rpcs = None
+            if not args.skip_serial:
+                beaker = server.client()
+                start = time.perf_counter()
+                serial_gather(beaker, "davidh", "ai2/benchmark", limit=size)
+                serial = time.perf_counter() - start
+                serial_rpcs = server.num_requests
+                beaker.close()
+
+            server.reset()
+            beaker = server.client()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                experiments = gather_experiments(
+                    ["davidh"], "ai2/benchmark", limit=size, beaker=beaker, concurrency=args.concurrency, use_index=False
+                )
+            concurrent = time.perf_counter() - start
+            concurrent_rpcs = server.num_requests
+            assert len(experiments) == size
+            beaker.close()
+
+            beaker = server.client()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                stream = iter_experiments(
+                    ["davidh"], "ai2/benchmark", limit=size, beaker=beaker, concurrency=args.concurrency, use_index=False
+                )
+                next(stream)
+                first = time.perf_counter() - start
+                stream.close()
+            beaker.close()
+
+        if serial is None:
+            print(f"{size:>11}  {'-':>9}  {'-':>6}  {concurrent:>9.2f}s  {concurrent_rpcs:>6}  {'-':>7}  {first:>6.2f}s")
+        else:
+            print(
+                f"{size:>11}  {serial:>8.2f}s  {serial_rpcs:>6}  {concurrent:>9.2f}s  {concurrent_rpcs:>6}  "
+                f"{serial / concurrent:>6.1f}x  {first:>6.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
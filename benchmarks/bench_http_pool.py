@@ -0,0 +1,49 @@
+"""
+Handshakes per command with and without the pooled PoorMansBeaker transport.
+
+    python -m benchmarks.bench_http_pool --jobs 500
+"""
+import argparse
+import time
+
+import requests
+
+from benchmarks.standin import StandInHTTPServer
+from cuvette.utils.poormansbeaker import JobClient, PoorMansBeaker
+
+
+def unpooled_list(base_url: str, token: str) -> int:
+    """The old transport: one module-level requests.get (and so one handshake) per page"""
+    headers = {"Authorization": f"Bearer {token}"}
+    params = {"finalized": False, "author": requests.get(f"{base_url}/api/v3/users/davidh", headers=headers).json()["id"]}
+    jobs = []
+    while True:
+        page = requests.get(f"{base_url}/api/v3/jobs", headers=headers, params=params).json()
+        jobs.extend(page["data"])
+        if not page.get("next"):
+            return len(jobs)
+        params["cursor"] = page["next"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=500, help="Number of jobs served by the stand-in")
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial per-request latency (s)")
+    args = parser.parse_args()
+
+    with StandInHTTPServer(num_jobs=args.jobs, latency=args.latency) as server:
+        start = time.perf_counter()
+        num_jobs = unpooled_list(server.url, token="benchmark")
+        elapsed = time.perf_counter() - start
+        print(f"before: {num_jobs} jobs, {server.num_requests} requests, {server.num_connections} handshakes, {elapsed:.3f}s")
+
+        server.reset()
+        start = time.perf_counter()
+        with PoorMansBeaker("benchmark", base_url=server.url) as pmb:
+            num_jobs = len(JobClient(beaker=pmb).list(author="davidh"))
+        elapsed = time.perf_counter() - start
+        print(f"after:  {num_jobs} jobs, {server.num_requests} requests, {server.num_connections} handshakes, {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
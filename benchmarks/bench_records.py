@@ -0,0 +1,129 @@
+"""
+Memory kept alive and attribute-access time of gather_experiments' results: the old wrapper
+around full protobufs vs. the slotted records. Each variant is built in a fresh process from
+serialized workloads and jobs (as they come off the wire or out of the index), and memory is
+the growth in resident set size, since the protobufs live outside Python's allocator (Linux only).
+
+    python -m benchmarks.bench_records --experiments 5000 --jobs 4
+"""
+import argparse
+import gc
+import multiprocessing
+import os
+import time
+from typing import List
+
+from beaker import BeakerExperiment, BeakerJob, BeakerWorkload
+from beaker import beaker_pb2 as pb2
+
+from benchmarks.standin import make_experiment, make_grpc_job
+from cuvette.utils.records import ExperimentWithJobs
+
+
+class LegacyExperimentWithJobs:
+    """The wrapper gather_experiments used to return"""
+    def __init__(self, experiment: BeakerExperiment, jobs: List[BeakerJob]):
+        self._experiment = experiment
+        self.jobs = jobs
+
+    def __getattr__(self, name):
+        return getattr(self._experiment, name)
+
+    @property
+    def id(self):
+        return self._experiment.id
+
+    @property
+    def name(self):
+        if hasattr(self._experiment, 'name'):
+            return self._experiment.name
+        return self._experiment.id
+
+
+def make_rows(num_experiments: int, jobs_per_experiment: int):
+    """Serialized workloads and jobs, with container specs about the size of a typical eval job"""
+    rows = []
+    for i in range(num_experiments):
+        workload = pb2.Workload(experiment=make_experiment(i, "davidh"))
+        task = workload.experiment.tasks[0]
+        jobs = []
+        for j in range(jobs_per_experiment):
+            job = make_grpc_job(task, j)
+            spec = job.container_spec
+            spec.docker_reference = "ghcr.io/allenai/cuda:12.1-cudnn8-dev-ubuntu20.04"
+            spec.command.extend(["python", "-m", "oe_eval.launch"])
+            spec.arguments.extend([f"--task=arc_challenge:mc::olmes --shard={j}", "--model=olmo-7b", "--gpus=1"])
+            for k in range(30):
+                spec.environment_variables.add(name=f"ENV_VAR_{k}", literal=f"value-{i}-{j}-{k}" * 3)
+            job.assignment_details.result_dataset_id = f"01DATASET{i:012d}{j:05d}"
+            job.system_details.replica_group_details.size = jobs_per_experiment
+            task.container_spec.CopyFrom(spec)
+            jobs.append(job.SerializeToString())
+        rows.append((workload.SerializeToString(), jobs))
+    return rows
+
+
+def rss() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def measure(variant: str, num_experiments: int, jobs_per_experiment: int, passes: int):
+    rows = make_rows(num_experiments, jobs_per_experiment)
+    gc.collect()
+    before = rss()
+
+    start = time.perf_counter()
+    if variant == "wrapper":
+        experiments = [
+            LegacyExperimentWithJobs(BeakerWorkload.FromString(workload).experiment, [BeakerJob.FromString(job) for job in jobs])
+            for workload, jobs in rows
+        ]
+    else:
+        experiments = [
+            ExperimentWithJobs.from_pb2(BeakerWorkload.FromString(workload), [BeakerJob.FromString(job) for job in jobs])
+            for workload, jobs in rows
+        ]
+    build = time.perf_counter() - start
+    gc.collect()
+    retained = rss() - before
+
+    # What the scripts read: ids and names, and per job whether it finished and how
+    start = time.perf_counter()
+    for _ in range(passes):
+        if variant == "wrapper":
+            for experiment in experiments:
+                experiment.id, experiment.name, experiment.created.seconds
+                for job in experiment.jobs:
+                    job.id, job.status.HasField("finalized"), job.status.exit_code, job.assignment_details.result_dataset_id
+        else:
+            for experiment in experiments:
+                experiment.id, experiment.name, experiment.created
+                for job in experiment.jobs:
+                    job.id, job.finalized is not None, job.exit_code, job.result_dataset_id
+    access = (time.perf_counter() - start) / passes
+    return retained, build, access
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--experiments", type=int, default=5000, help="Experiments gathered")
+    parser.add_argument("--jobs", type=int, default=4, help="Jobs per experiment")
+    parser.add_argument("--passes", type=int, default=5, help="Passes over the results when timing attribute access")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    print(f"{'':>8}  {'memory':>9}  {'build':>7}  {'access':>7}")
+    results = {}
+    for variant in ("wrapper", "records"):
+        with context.Pool(1) as pool:
+            results[variant] = pool.apply(measure, (variant, args.experiments, args.jobs, args.passes))
+        retained, build, access = results[variant]
+        print(f"{variant:>8}  {retained / 2**20:>6.1f}MiB  {build:>6.2f}s  {access * 1000:>5.1f}ms")
+
+    (old_memory, _, old_access), (new_memory, _, new_access) = results["wrapper"], results["records"]
+    print(f"records keep {old_memory / max(new_memory, 1):.1f}x less memory alive and read {old_access / new_access:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
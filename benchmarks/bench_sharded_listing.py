@@ -0,0 +1,50 @@
+"""
+Wall time and RPCs to list every experiment of a large workspace, one paginated listing vs. the
+listing split into time shards paged in parallel, against a local gRPC stand-in. Checks the
+sharded listings return the same experiments in the same order.
+
+    python -m benchmarks.bench_sharded_listing --experiments 20000 --shards 1 2 4 8 16
+"""
+import argparse
+import os
+import tempfile
+import time
+
+# Keep the benchmark's name resolutions out of the real cache
+os.environ.setdefault("CUVETTE_CACHE_DIR", tempfile.mkdtemp(prefix="cuvette-bench-"))
+
+from benchmarks.standin import StandInGrpcServer  # noqa: E402
+from cuvette.utils.general import iter_sharded_workloads  # noqa: E402
+from cuvette.utils.resolver import resolve_org, resolve_user, resolve_workspace  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--experiments", type=int, default=20000, help="Experiments in the workspace")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="Shard counts to try")
+    parser.add_argument("--latency", type=float, default=0.005, help="Artificial per-RPC latency (s)")
+    args = parser.parse_args()
+
+    with StandInGrpcServer(num_experiments=args.experiments, latency=args.latency) as server:
+        beaker = server.client()
+        org = resolve_org(beaker)
+        workspace = resolve_workspace(beaker, "ai2/benchmark")
+        user = resolve_user(beaker, "davidh")
+
+        expected = None
+        baseline = None
+        print(f"{'shards':>6}  {'time':>7}  {'RPCs':>5}  {'speedup':>7}")
+        for shards in args.shards:
+            server.reset()
+            start = time.perf_counter()
+            ids = [workload.experiment.id for workload in iter_sharded_workloads(beaker, workspace, user, org, shards)]
+            elapsed = time.perf_counter() - start
+            if expected is None:
+                expected, baseline = ids, elapsed
+            assert ids == expected, f"{shards} shards listed different experiments"
+            print(f"{shards:>6}  {elapsed:>6.2f}s  {server.num_requests:>5}  {baseline / elapsed:>6.1f}x")
+        beaker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+RPCs and wall time to find the failed experiments of a workspace (what brestart does), filtering
+on the client after fetching every experiment's jobs vs. sending the status filter to the server.
+
+    python -m benchmarks.bench_status_filter --experiments 5000 --failed 30
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+# Keep the benchmark's index and name resolutions out of the real cache
+os.environ.setdefault("CUVETTE_CACHE_DIR", tempfile.mkdtemp(prefix="cuvette-bench-"))
+
+from beaker import BeakerWorkloadStatus  # noqa: E402
+
+from benchmarks.standin import StandInGrpcServer  # noqa: E402
+from cuvette.utils.general import gather_experiments  # noqa: E402
+
+
+def failed(experiment) -> bool:
+    return any(job.exit_code != 0 for job in experiment.jobs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--experiments", type=int, default=5000, help="Experiments in the workspace")
+    parser.add_argument("--failed", type=int, default=30, help="How many of them failed")
+    parser.add_argument("--latency", type=float, default=0.005, help="Artificial per-RPC latency (s)")
+    args = parser.parse_args()
+
+    runs = [
+        ("client-side filter", dict(use_index=False)),
+        ("server-side filter", dict(use_index=False, statuses=[BeakerWorkloadStatus.failed])),
+        ("server-side filter, indexed", dict(statuses=[BeakerWorkloadStatus.failed])),
+    ]
+
+    with StandInGrpcServer(num_experiments=args.experiments, failed=args.failed, latency=args.latency) as server:
+        # Index the workspace first, so the last run can serve finished jobs locally
+        with contextlib.redirect_stdout(io.StringIO()):
+            gather_experiments(["davidh"], "ai2/benchmark", limit=args.experiments, beaker=server.client())
+
+        print(f"{'':>28}  {'failed':>6}  {'time':>7}  {'RPCs':>6}  {'job.list':>8}")
+        for name, kwargs in runs:
+            server.reset()
+            beaker = server.client()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                experiments = gather_experiments(
+                    ["davidh"], "ai2/benchmark", limit=args.experiments, beaker=beaker, **kwargs
+                )
+            elapsed = time.perf_counter() - start
+            num_failed = sum(failed(experiment) for experiment in experiments)
+            beaker.close()
+            print(
+                f"{name:>28}  {num_failed:>6}  {elapsed:>6.2f}s  {server.num_requests:>6}  {server.calls['ListJobs']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""
+Local stand-ins for the Beaker API, so benchmarks can run without a token or network access
+"""
+import bisect
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+import grpc
+from beaker import Beaker, BeakerSortOrder, beaker_pb2 as pb2, beaker_pb2_grpc
+from beaker.config import Config
+
+
+def make_job(i: int) -> dict:
+    return {
+        "id": f"01JOB{i:021d}",
+        "kind": "execution",
+        "name": f"job-{i}",
+        "status": {"started": "2025-01-01T00:00:00Z"},
+        "execution": {"spec": {"envVars": [{"name": "CUVETTE_PORT", "value": "12345"}]}},
+    }
+
+
+class StandInHTTPServer:
+    """
+    A tiny keep-alive HTTP server mimicking the paginated /api/v3 jobs and users endpoints.
+    Counts accepted TCP connections, i.e. the handshakes a client had to pay.
+    """
+    def __init__(
+        self,
+        num_jobs: int = 500,
+        page_size: int = 50,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        tail_rate: float = 0.0,
+        tail_latency: float = 1.0,
+    ):
+        self.num_jobs = num_jobs
+        self.page_size = page_size
+        self.latency = latency
+        self.error_rate = error_rate  # fraction of requests answered with 503 + Retry-After
+        self.tail_rate = tail_rate  # fraction of requests that take an extra `tail_latency`
+        self.tail_latency = tail_latency
+        self.num_connections = 0
+        self.num_requests = 0
+        self._lock = threading.Lock()
+
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with standin._lock:
+                    standin.num_connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with standin._lock:
+                    standin.num_requests += 1
+                if standin.latency:
+                    time.sleep(standin.latency)
+                if standin.tail_rate and random.random() < standin.tail_rate:
+                    time.sleep(standin.tail_latency)
+                if standin.error_rate and random.random() < standin.error_rate:
+                    self.send_response(503)
+                    self.send_header("Retry-After", "0")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                path = url.path.removeprefix("/api/v3/")
+                if path.startswith("users/"):
+                    body = {"id": "01USER", "name": path.split("/", 1)[1]}
+                elif path == "jobs":
+                    start = int(query.get("cursor", ["0"])[0])
+                    end = min(start + standin.page_size, standin.num_jobs)
+                    body = {"data": [make_job(i) for i in range(start, end)]}
+                    if end < standin.num_jobs:
+                        body["next"] = str(end)
+                elif path.startswith("jobs/01JOB"):
+                    body = make_job(int(path.removeprefix("jobs/01JOB")))
+                else:
+                    self.send_error(404)
+                    return
+                payload = json.dumps(body).encode()
+                etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        class Server(ThreadingHTTPServer):
+            request_queue_size = 1024
+
+        self.server = Server(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset(self):
+        with self._lock:
+            self.num_connections = 0
+            self.num_requests = 0
+
+    def __enter__(self) -> "StandInHTTPServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def timestamp(value) -> float:
+    return value.seconds + value.nanos / 1e9
+
+
+def make_experiment(i: int, author: str, num_tasks: int = 1) -> pb2.Experiment:
+    experiment = pb2.Experiment(
+        id=f"01EXP{i:021d}", name=f"experiment-{i}", author_id=f"01USER{author}", workspace_id="01WORKSPACE"
+    )
+    experiment.created.FromDatetime(EPOCH + timedelta(minutes=i))
+    for t in range(num_tasks):
+        experiment.tasks.add(id=f"01TASK{i:015d}{t:06d}", experiment_id=experiment.id, name=f"task-{t}")
+    return experiment
+
+
+def make_grpc_job(task: pb2.Task, j: int, finalized: bool = True, scheduled: bool = True) -> pb2.Job:
+    job = pb2.Job(id=f"{task.id.replace('01TASK', '01JOB')}{j:03d}", task_id=task.id, name=f"{task.name}-{j}")
+    job.status.created.FromDatetime(EPOCH)
+    if scheduled or finalized:
+        job.status.scheduled.FromDatetime(EPOCH)
+    if finalized:
+        job.status.exited.FromDatetime(EPOCH)
+        job.status.finalized.FromDatetime(EPOCH)
+        job.status.exit_code = 0
+    return job
+
+
+class StandInGrpcServer(beaker_pb2_grpc.BeakerServicer):
+    """
+    An insecure in-process gRPC server implementing the handful of Beaker RPCs cuvette uses to
+    gather experiments. Experiments are spread round-robin over `authors`, the newest `active`
+    of them have jobs still queued or running and `failed` of the others are spread out failures. Counts
+    calls per method.
+    """
+    def __init__(
+        self,
+        num_experiments: int = 100,
+        tasks_per_experiment: int = 1,
+        jobs_per_task: int = 1,
+        authors: tuple = ("davidh",),
+        active: int = 0,
+        failed: int = 0,
+        latency: float = 0.0,
+        max_workers: int = 64,
+        capacity: Optional[int] = None,
+    ):
+        self.tasks_per_experiment = tasks_per_experiment
+        self.jobs_per_task = jobs_per_task
+        self.authors = authors
+        self.active = active
+        self.failed_every = num_experiments // failed if failed else 0
+        self.latency = latency
+        self.capacity = capacity  # concurrent writes served before slowing down, and rejected past twice that
+        self.in_flight = 0
+        self.canceled = Counter()
+        self.restarted = Counter()
+        self.prioritized = Counter()
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        # Newest first, like the default workload.list sort order
+        self.experiments = []
+        self.add_experiments(num_experiments)
+
+        self.server = grpc.server(ThreadPoolExecutor(max_workers=max_workers))
+        beaker_pb2_grpc.add_BeakerServicer_to_server(self, self.server)
+        self.port = self.server.add_insecure_port("127.0.0.1:0")
+
+    @property
+    def num_requests(self) -> int:
+        return sum(self.calls.values())
+
+    def _call(self, method: str):
+        with self._lock:
+            self.calls[method] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+            self.canceled.clear()
+            self.restarted.clear()
+            self.prioritized.clear()
+
+    def _write(self, method: str, context):
+        """Like _call() for mutations, which contend for `capacity`: latency grows past it and calls fail past 2x"""
+        with self._lock:
+            self.calls[method] += 1
+            self.in_flight += 1
+            load = self.in_flight / self.capacity if self.capacity else 0.0
+        try:
+            if load > 2:
+                context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "rate limited")
+            time.sleep(self.latency * max(1.0, load))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def add_experiments(self, n: int):
+        """Submit `n` new experiments (they become the newest, and active ones)"""
+        start = len(self.experiments)
+        new = [make_experiment(i, self.authors[i % len(self.authors)], self.tasks_per_experiment) for i in range(start, start + n)]
+        self.experiments[:0] = reversed(new)
+        self._created_keys = [-timestamp(experiment.created) for experiment in self.experiments]
+
+    def is_active(self, experiment_index: int) -> bool:
+        return experiment_index >= len(self.experiments) - self.active
+
+    def is_failed(self, experiment_index: int) -> bool:
+        return bool(self.failed_every) and experiment_index % self.failed_every == 0 and not self.is_active(experiment_index)
+
+    def status(self, experiment_index: int) -> int:
+        if self.is_active(experiment_index):
+            return pb2.WorkloadStatus.STATUS_RUNNING
+        if self.is_failed(experiment_index):
+            return pb2.WorkloadStatus.STATUS_FAILED
+        return pb2.WorkloadStatus.STATUS_SUCCEEDED
+
+    def client(self) -> Beaker:
+        """A Beaker client whose gRPC calls go to this server (beaker-py only opens TLS channels)"""
+        config = Config(
+            user_token="benchmark",
+            default_org="ai2",
+            agent_address=f"http://127.0.0.1:{self.port}",
+            rpc_address=f"127.0.0.1:{self.port}",
+        )
+        beaker = Beaker(config, check_for_upgrades=False)
+        beaker._channel = grpc.insecure_channel(f"127.0.0.1:{self.port}")
+        beaker._service = beaker_pb2_grpc.BeakerStub(beaker._channel)
+        return beaker
+
+    def ResolveOrganizationName(self, request, context):
+        self._call("ResolveOrganizationName")
+        return pb2.ResolveOrganizationNameResponse(organization_id=f"01ORG{request.organization_name}")
+
+    def ResolveUserName(self, request, context):
+        self._call("ResolveUserName")
+        return pb2.ResolveUserNameResponse(user_id=f"01USER{request.user_name}")
+
+    def GetUser(self, request, context):
+        self._call("GetUser")
+        user_id = request.user_id or f"01USER{self.authors[0]}"  # no ID asks for the token's own user
+        return pb2.GetUserResponse(user=pb2.User(id=user_id, name=user_id.removeprefix("01USER")))
+
+    def ResolveWorkspaceName(self, request, context):
+        self._call("ResolveWorkspaceName")
+        return pb2.ResolveWorkspaceNameResponse(workspace_id="01WORKSPACE")
+
+    def GetWorkspace(self, request, context):
+        self._call("GetWorkspace")
+        return pb2.GetWorkspaceResponse(workspace=pb2.Workspace(id=request.workspace_id))
+
+    def ListWorkloads(self, request, context):
+        self._call("ListWorkloads")
+        # next_page_token and options are a oneof, so the token has to carry the filters
+        if request.next_page_token:
+            cursor, _, opts = request.next_page_token.partition(":")
+            cursor, opts = int(cursor), pb2.ListWorkloadsRequest.Opts.FromString(bytes.fromhex(opts))
+        else:
+            cursor, opts = 0, request.options
+        if opts.workspace_id and opts.workspace_id != "01WORKSPACE":
+            context.abort(grpc.StatusCode.NOT_FOUND, "workspace not found")
+
+        # Experiments are newest first, so the time window is a slice found by bisection
+        keys = self._created_keys
+        lo = bisect.bisect_right(keys, -timestamp(opts.created_before)) if opts.HasField("created_before") else 0
+        hi = bisect.bisect_left(keys, -timestamp(opts.created_after)) if opts.HasField("created_after") else len(keys)
+        experiments = self.experiments[lo:hi]
+        if opts.sort_clause.sort_order == BeakerSortOrder.ascending.as_pb2():
+            experiments.reverse()
+
+        def matches(experiment):
+            index = int(experiment.id.removeprefix("01EXP"))
+            return (
+                (not opts.author_id or experiment.author_id == opts.author_id)
+                and (not opts.HasField("job_finalized") or opts.job_finalized != self.is_active(index))
+                and (not opts.statuses or self.status(index) in opts.statuses)
+                and opts.name_or_description_substring in experiment.name
+            )
+
+        page = []
+        page_size = opts.page_size or 50
+        while cursor < len(experiments) and len(page) < page_size:
+            if matches(experiments[cursor]):
+                page.append(experiments[cursor])
+            cursor += 1
+        while cursor < len(experiments) and not matches(experiments[cursor]):
+            cursor += 1
+        return pb2.ListWorkloadsResponse(
+            workloads=[
+                pb2.Workload(experiment=experiment, status=self.status(int(experiment.id.removeprefix("01EXP"))))
+                for experiment in page
+            ],
+            next_page_token=f"{cursor}:{opts.SerializeToString().hex()}" if cursor < len(experiments) else "",
+        )
+
+    def GetWorkload(self, request, context):
+        self._write("GetWorkload", context)
+        index = int(request.workload_id.removeprefix("01EXP"))
+        experiment = self.experiments[len(self.experiments) - 1 - index]
+        return pb2.GetWorkloadResponse(workload=pb2.Workload(experiment=experiment, status=self.status(index)))
+
+    def CancelWorkloads(self, request, context):
+        self._write("CancelWorkloads", context)
+        with self._lock:
+            self.canceled.update(request.workload_ids)
+        return pb2.CancelWorkloadsResponse(workload_ids=request.workload_ids)
+
+    def RestartExperimentTasks(self, request, context):
+        self._write("RestartExperimentTasks", context)
+        with self._lock:
+            self.restarted[request.experiment_id] += 1
+        index = int(request.experiment_id.removeprefix("01EXP"))
+        experiment = self.experiments[len(self.experiments) - 1 - index]
+        return pb2.RestartExperimentTasksResponse(workload=pb2.Workload(experiment=experiment, status=self.status(index)))
+
+    def ListJobs(self, request, context):
+        self._call("ListJobs")
+        task_id = request.options.task_id
+        task = pb2.Task(id=task_id, name=task_id[-6:])
+        experiment_index = int(task_id.removeprefix("01TASK")[:15])
+        active = self.is_active(experiment_index)
+        # Half the active experiments are still queued, the other half running
+        jobs = [make_grpc_job(task, j, not active, experiment_index % 2 == 1) for j in range(self.jobs_per_task)]
+        if self.is_failed(experiment_index):
+            for job in jobs:
+                job.status.exit_code = 1
+        options = request.options
+        if options.HasField("finalized"):
+            jobs = [job for job in jobs if job.status.HasField("finalized") == options.finalized]
+        if options.HasField("scheduled"):
+            jobs = [job for job in jobs if job.status.HasField("scheduled") == options.scheduled]
+        return pb2.ListJobsResponse(jobs=jobs)
+
+    def UpdateJobSourcePriority(self, request, context):
+        self._write("UpdateJobSourcePriority", context)
+        with self._lock:
+            self.prioritized[request.job_id] += 1
+        return pb2.UpdateJobSourcePriorityResponse()
+
+    def __enter__(self) -> "StandInGrpcServer":
+        self.server.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.server.stop(grace=None)
@@ -1,8 +1,19 @@
 import argparse
+import functools
+import os
+from typing import Callable
 
-from cuvette.utils.general import run_command
+from beaker.exceptions import BeakerNotFoundError
 
+from cuvette.constants.beaker import BEAKER_ID
+from cuvette.utils.bulk import BulkExecutor
+from cuvette.utils.clients import get_beaker
+from cuvette.utils.general import get_default_user, run_command
+from cuvette.utils.resolver import resolve_user
+from cuvette.utils.timings import with_timings
 
+
+@with_timings
 def ai2code():
     parser = argparse.ArgumentParser(description="Launch remote VSCode on ai2 host")
     parser.add_argument(
@@ -22,6 +33,7 @@ def ai2code():
     return stdout
 
 
+@with_timings
 def ai2cursor():
     parser = argparse.ArgumentParser(description="Launch remote Cursor on ai2 host")
     parser.add_argument(
@@ -41,6 +53,7 @@ def ai2cursor():
     return stdout
 
 
+@with_timings
 def ai2codereset():
     cmd = "ai2 'rm -rf ~/.vscode-server/cli/servers'"
     stdout, stderr, returncode = run_command(cmd)
@@ -49,6 +62,7 @@ def ai2codereset():
     return stdout
 
 
+@with_timings
 def ai2checks():
     cmd = "make type-check && make build && make style-check && make lint-check"
     stdout, stderr, returncode = run_command(cmd)
@@ -57,6 +71,7 @@ def ai2checks():
     return stdout
 
 
+@with_timings
 def ai2cleanup():
     parser = argparse.ArgumentParser(description="Run code formatting and linting tools")
     parser.add_argument(
@@ -84,29 +99,72 @@ def ai2_ssh():
     return stdout
 
 
+def _cancel_session(beaker, session: str, author: Callable[[], str]):
+    """Cancel a session given by workload ID, job ID, name or author/name. `author()` qualifies bare names."""
+    if "/" not in session and not BEAKER_ID.fullmatch(session):
+        session = f"{author()}/{session}"  # a bare name, like the CLI takes
+    try:
+        beaker.workload.cancel(session)
+    except BeakerNotFoundError:
+        if "/" in session:
+            raise
+        # Not a workload ID, but bd and bport show sessions by their job ID
+        beaker.workload.cancel(beaker.job.get(session).workload_id)
+
+
+def _cuvette_sessions(beaker, author: str) -> list[str]:
+    """The workload IDs of the author's unfinished workloads with "cuvette" in their name"""
+    workloads = beaker.workload.list(
+        author=resolve_user(beaker, author), finalized=False, name_or_description="cuvette"
+    )
+    sessions = []
+    for workload in workloads:
+        # The filter also matches descriptions
+        name = workload.experiment.name if beaker.workload.is_experiment(workload) else workload.environment.name
+        if "cuvette" in name:
+            sessions.append(beaker.workload.resolve_workload_id(workload))
+    return sessions
+
+
+@with_timings
 def beaker_session_stop():
     parser = argparse.ArgumentParser(description="Stop beaker session(s)")
     parser.add_argument(
-        "session_names", nargs="*", help="Names of sessions to stop"
+        "session_names", nargs="*",
+        help="Names or IDs of sessions to stop (default: the session this runs in)",
+    )
+    parser.add_argument(
+        "--all-cuvette", action="store_true", default=False,
+        help="Stop every unfinished session of yours whose name contains 'cuvette'",
     )
 
     args = parser.parse_args()
 
-    if len(args.session_names) > 1:
-        # Stop multiple sessions
-        for session_name in args.session_names:
-            print(f'Stopping {session_name}')
-            cmd = f"beaker session stop {session_name}"
-            stdout, stderr, returncode = run_command(cmd)
-            if returncode != 0:
-                raise RuntimeError(f"Failed to stop beaker session {session_name}: {stderr}")
-        return
-    elif len(args.session_names) == 1:
-        cmd = f"beaker session stop {args.session_names[0]}"
-    else:
-        cmd = "beaker session stop"
-    
-    stdout, stderr, returncode = run_command(cmd)
-    if returncode != 0:
-        raise RuntimeError(f"Failed to stop beaker session: {stderr}")
-    return stdout
+    beaker = get_beaker()
+    # Only bare names and --all-cuvette need to know who we are
+    author = functools.cache(get_default_user)
+    sessions = list(args.session_names)
+    if args.all_cuvette:
+        sessions = list(dict.fromkeys(sessions + _cuvette_sessions(beaker, author())))
+        if not sessions:
+            print("No cuvette sessions to stop")
+            return
+    elif not sessions:
+        # Like `beaker session stop` with no arguments, from inside a session
+        if "BEAKER_WORKLOAD_ID" not in os.environ:
+            parser.error("give session names or IDs, or --all-cuvette, when not running inside a session")
+        sessions = [os.environ["BEAKER_WORKLOAD_ID"]]
+
+    # Cancel through the SDK in parallel instead of one `beaker session stop` cold start per session
+    failed = {}
+    executor = BulkExecutor(lambda session: _cancel_session(beaker, session, author), "stopped", report_every=None)
+    for result in executor.run(sessions):
+        if result.error is not None:
+            failed[result.item] = result.error
+            print(f"Failed to stop {result.item}: {result.error}")
+        else:
+            print(f"Stopped {result.item}")
+
+    print(f"Stopped {len(sessions) - len(failed)} of {len(sessions)} sessions")
+    if failed:
+        raise RuntimeError(f"Failed to stop beaker session(s): {', '.join(failed)}")
@@ -0,0 +1,4 @@
+import re
+
+# Beaker IDs, e.g. of workloads, jobs and users (a ULID-style "01" prefix and uppercase base32)
+BEAKER_ID = re.compile(r"01[A-Z0-9]{24,}")
@@ -6,6 +6,7 @@ from typing import Optional
 
 from cuvette.gui import ClusterSelector
 from cuvette.session import ExperimentLauncher, Launcher, SessionLauncher
+from cuvette.utils.timings import with_timings
 
 SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -28,6 +29,7 @@ def _print_final_output(selector):
             print(line)
 
 
+@with_timings
 def main():
     try:
         parser = argparse.ArgumentParser(description="Beaker Launch Tool")
@@ -1,13 +1,25 @@
-from typing import List
+from typing import Dict, Iterator, List, Set, Tuple
 
 import grpc
 
-from beaker import Beaker, BeakerJobPriority
+from beaker import BeakerJobPriority
 from beaker import beaker_pb2 as pb2
 from beaker._service_client import RpcMethod
 from beaker.exceptions import BeakerJobNotFound
 
-from cuvette.utils.general import get_default_user
+from cuvette.utils.bulk import AIMDLimiter, BulkExecutor
+from cuvette.utils.clients import get_beaker, rpc_count
+from cuvette.utils.general import (
+    ExperimentWithJobs,
+    add_shard_args,
+    get_default_user,
+    iter_experiments,
+    list_experiment_jobs,
+)
+from cuvette.utils.index import add_index_args
+from cuvette.utils.journal import Journal, add_journal_args
+from cuvette.utils.resolver import resolve_org
+from cuvette.utils.timings import timed, with_timings
 
 
 PRIORITY_MAP = {
@@ -17,64 +29,86 @@ PRIORITY_MAP = {
     "urgent": BeakerJobPriority.urgent,
 }
 
-def gather_experiments(
-    beaker: Beaker, 
-    author_list: List[str], 
-    workspace_name: str, 
-    limit: int = 2000) -> List[pb2.Workload]:
-    """Gather all experiments from a workspace, filtered by author."""
-    workspace = beaker.workspace.get(workspace_name)
-    
-    workloads = []
-    for author in author_list:
-        # Server-side filtering by author AND workspace - much faster!
-        for workload in beaker.workload.list(
-            workspace=workspace,
-            author=author,  # Filter happens on server
-            limit=limit - len(workloads),
-        ):
-            workloads.append(workload)
-            if len(workloads) >= limit:
-                break
-        if len(workloads) >= limit:
-            break
-    
-    print(f"Total experiments for authors {author_list}: {len(workloads)}")
-    return workloads
-
-
-def change_priority(author, workspace, priority, limit=5000):
-    with Beaker.from_env() as beaker:
-        workloads = gather_experiments(beaker, [author], workspace, limit)
-        print(f"Found {len(workloads)} experiments")
-
-        priority_enum = PRIORITY_MAP[priority]
-
-        for i, workload in enumerate(workloads):
-            experiment_id = workload.experiment.id
-            
-            # Get jobs from tasks
-            for task in workload.experiment.tasks:
-                for job in beaker.job.list(task=task, limit=10):  # Get recent jobs per task
-                    try:
-                        request = pb2.UpdateJobSourcePriorityRequest(
-                            job_id=job.id,
-                            priority=priority_enum.as_pb2(),
-                        )
-                        beaker.job.rpc_request(
-                            RpcMethod[pb2.UpdateJobSourcePriorityResponse](
-                                beaker.job.service.UpdateJobSourcePriority
-                            ),
-                            request,
-                            exceptions_for_status={
-                                grpc.StatusCode.NOT_FOUND: BeakerJobNotFound(job.id),
-                            },
-                        )
-                    except Exception as e:
-                        print(f"Failed to update priority for job {job.id}: {e}")
-
-            print(f"({i+1}/{len(workloads)}) updated https://beaker.org/ex/{experiment_id})")
-
+def change_priority(
+    authors, workspace, priority, limit=5000, use_index=True, shards=1, resume=False, queued_only=False,
+    max_in_flight=32,
+):
+    beaker = get_beaker()
+    # Finalized jobs can't be rescheduled, and running ones only keep their priority for preemption
+    job_filters = dict(finalized=False, scheduled=False) if queued_only else dict(finalized=False)
+
+    with timed("grpc resolve org"):
+        org = resolve_org(beaker)  # or job.list resolves the default org on every call
+
+    def list_active_jobs(experiment: ExperimentWithJobs) -> List[str]:
+        return [job.id for job in list_experiment_jobs(beaker, experiment.task_ids, org, **job_filters)]
+
+    def list_experiments() -> Iterator[Tuple[str, List[str]]]:
+        experiments = iter_experiments(
+            authors,
+            workspace_name=workspace,
+            limit=limit,
+            use_index=use_index,
+            shards=shards,
+            finalized=False,  # finished experiments have no jobs left to reprioritize
+            lazy_jobs=True,  # only their active jobs are listed, below
+        )
+        # Active jobs are listed concurrently, as experiments stream in
+        for result in BulkExecutor(list_active_jobs, "listed", report_every=None).run(experiments):
+            if result.error is not None:
+                print(f"Failed to list jobs of https://beaker.org/ex/{result.item.id}: {result.error}")
+            elif result.value:
+                yield result.item.id, result.value
+
+    priority_pb2 = PRIORITY_MAP[priority].as_pb2()
+    update_method = RpcMethod[pb2.UpdateJobSourcePriorityResponse](beaker.job.service.UpdateJobSourcePriority)
+
+    def update(item: Tuple[str, str]):
+        _, job_id = item
+        beaker.job.rpc_request(
+            update_method,
+            pb2.UpdateJobSourcePriorityRequest(job_id=job_id, priority=priority_pb2),
+            exceptions_for_status={grpc.StatusCode.NOT_FOUND: BeakerJobNotFound(job_id)},
+        )
+
+    # Job IDs are journaled with each experiment, so a resumed run doesn't list them again
+    journal = Journal(
+        "bpriority",
+        dict(authors=authors, workspace=workspace, priority=priority, limit=limit, queued_only=queued_only),
+        resume=resume,
+    )
+    jobs_left: Dict[str, int] = {}
+    failed: Set[str] = set()
+
+    def job_items() -> Iterator[Tuple[str, str]]:
+        pending = journal.pending(list_experiments, key=lambda item: item[0], data=lambda item: {"jobs": item[1]})
+        for experiment_id, data in pending:
+            jobs_left[experiment_id] = len(data["jobs"])
+            for job_id in data["jobs"]:
+                yield experiment_id, job_id
+
+    # Updates share the client's one channel, at most `max_in_flight` at a time
+    limiter = AIMDLimiter(initial=min(8, max_in_flight), maximum=max_in_flight)
+    num_experiments = 0
+    with journal:
+        for result in BulkExecutor(update, "updated", limiter=limiter).run(job_items()):
+            experiment_id, job_id = result.item
+            if result.error is not None:
+                failed.add(experiment_id)
+                journal.fail(experiment_id, result.error)
+                print(f"Failed to update priority for job {job_id}: {result.error}")
+
+            jobs_left[experiment_id] -= 1
+            if jobs_left[experiment_id] == 0:
+                num_experiments += 1
+                if experiment_id not in failed:
+                    journal.complete(experiment_id)
+                print(f"({num_experiments}) updated https://beaker.org/ex/{experiment_id})")
+
+    print(f"Updated {num_experiments} experiments ({rpc_count()} RPCs)")
+
+
+@with_timings
 def main():
     import argparse
 
@@ -83,10 +117,14 @@ def main():
         "--author",
         "-a",
         type=str,
-        default=get_default_user(),
-        help="Author name to filter experiments by.",
+        nargs="+",
+        default=[get_default_user()],
+        help="Author name(s) to filter experiments by, e.g. -a alice bob carol.",
+    )
+    parser.add_argument(
+        "-w", "--workspace", type=str, nargs="+", required=True,
+        help="Beaker workspace name(s), several are crawled concurrently, e.g. -w ai2/a ai2/b.",
     )
-    parser.add_argument("-w", "--workspace", type=str, required=True, help="Beaker workspace name")
     parser.add_argument(
         "-p",
         "--priority",
@@ -98,9 +136,22 @@ def main():
     parser.add_argument(
         "-l", "--limit", type=int, default=100, help="Maximum number of experiments to check"
     )
+    parser.add_argument(
+        "--queued-only", action="store_true", default=False,
+        help="Only update jobs that haven't been scheduled yet, the ones whose priority decides when they start.",
+    )
+    parser.add_argument(
+        "--max-in-flight", type=int, default=32, help="Maximum priority updates sent at once"
+    )
+    add_index_args(parser)
+    add_shard_args(parser)
+    add_journal_args(parser)
     args = parser.parse_args()
 
-    change_priority(args.author, args.workspace, args.priority, args.limit)
+    change_priority(
+        args.author, args.workspace, args.priority, args.limit, use_index=not args.no_index, shards=args.shards,
+        resume=args.resume, queued_only=args.queued_only, max_in_flight=args.max_in_flight,
+    )
 
 
 if __name__ == "__main__":
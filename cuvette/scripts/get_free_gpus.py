@@ -1,12 +1,14 @@
+import argparse
 import concurrent.futures
 import json
-import subprocess
 from typing import Dict
 
 from rich.console import Console
 from rich.table import Table
 
 from cuvette.constants.clusters import CLUSTERS
+from cuvette.utils.cache import add_cache_args, apply_cache_args, cached_command
+from cuvette.utils.timings import with_timings
 
 
 def get_cluster_free_gpus(cluster) -> Dict[str, int]:
@@ -14,7 +16,7 @@ def get_cluster_free_gpus(cluster) -> Dict[str, int]:
     try:
         # Run beaker CLI command to get free slots
         cmd = ["beaker", "cluster", "free-slots", cluster, "--format", "json"]
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = cached_command(cmd)
 
         if result.returncode == 0:
             # Parse JSON output
@@ -57,8 +59,13 @@ def get_free_gpus():
     return free_gpus
 
 
+@with_timings
 def main():
-    # Usage example:
+    parser = argparse.ArgumentParser(description="Show free GPUs on each cluster.")
+    add_cache_args(parser)
+    args = parser.parse_args()
+    apply_cache_args(args)
+
     free_gpus = get_free_gpus()
 
     console = Console()
@@ -1,13 +1,21 @@
 import argparse
+import functools
+import sys
+import time
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Literal
+from typing import Iterator, Literal
 
 from rich.console import Console
+from rich.live import Live
 from rich.table import Table
 
+from cuvette.utils.cache import add_cache_args, apply_cache_args, get_cache
 from cuvette.utils.general import get_default_user
 from cuvette.utils.poormansbeaker import JobClient, PoorMansBeaker
+from cuvette.utils.timings import timed, with_timings
+
+MAX_CONCURRENCY = 32
 
 
 @dataclass
@@ -55,26 +63,43 @@ def categorize_and_sort_jobs(jobs: list[ProcessedJob]) -> list[ProcessedJob]:
     return queued_jobs + executing_jobs + queued_sessions + executing_sessions
 
 
-def list_workloads(
+@functools.cache
+def get_client() -> PoorMansBeaker:
+    """One pooled HTTPS client per process, so listing and detail fetches share connections"""
+    # Hedge slow pages: one straggler would otherwise hold up the whole table
+    return PoorMansBeaker.from_env(pool_size=MAX_CONCURRENCY, cache=get_cache(), hedge=True)
+
+
+def iter_workloads(
     username: str,
     sessions_only: bool = False,
     limit: int | None = 10,
-) -> list[dict]:
-    """gRPC is slow, so uses HTTPS for sessions+experiment data"""
-    pmb = PoorMansBeaker.from_env()
-    workloads = JobClient(beaker=pmb).list(
+) -> Iterator[dict]:
+    """gRPC is slow, so uses HTTPS for sessions+experiment data. Yields jobs as pages arrive."""
+    return JobClient(beaker=get_client()).iter_jobs(
         author=username, 
         finalized=False, 
         limit=limit, 
         kind=("session" if sessions_only else None)
     )
-    return workloads
+
+
+def list_workloads(
+    username: str,
+    sessions_only: bool = False,
+    limit: int | None = 10,
+) -> list[dict]:
+    return list(iter_workloads(username, sessions_only=sessions_only, limit=limit))
 
 
 def get_workload_details(job_id: str) -> dict:
     """Fetch detailed info for a single job (includes env_vars, port_mappings, etc.)"""
-    pmb = PoorMansBeaker.from_env()
-    return JobClient(beaker=pmb).get(job_id)
+    return JobClient(beaker=get_client()).get(job_id)
+
+
+def get_workloads_details(job_ids: list[str]) -> list[dict | BaseException]:
+    """Fetch detailed info for many jobs concurrently (in input order, failures returned in place)"""
+    return JobClient(beaker=get_client()).get_many(job_ids, concurrency=MAX_CONCURRENCY)
 
 
 def parse_job_dict(job: dict) -> ProcessedJob:
@@ -168,37 +193,54 @@ def parse_job_dict(job: dict) -> ProcessedJob:
     return processed_job
 
 
-def get_job_data(username: str, sessions_only: bool = True) -> list[ProcessedJob]:
-    jobs = list_workloads(
+def iter_job_data(
+    username: str, sessions_only: bool = True, limit: int | None = None
+) -> Iterator[ProcessedJob]:
+    """Parse (and filter) jobs as they stream in. Unsorted, see categorize_and_sort_jobs."""
+    jobs = iter_workloads(
         username,
         # sessions_only=sessions_only,
-        limit=None,
+        limit=limit,
     )
 
-    # Parse job data
-    processed_jobs = []
     for job in jobs:
         processed_job = parse_job_dict(job)
-        processed_jobs.append(processed_job)
 
-    # Filter sessions by name or kind
-    if sessions_only:
-        processed_jobs = [
-            job for job in processed_jobs if \
-                job.name and 'cuvette' in job.name or 
-                job.kind == 'session'
-        ]
+        # Filter sessions by name or kind
+        if sessions_only and not (
+            processed_job.name and 'cuvette' in processed_job.name or 
+            processed_job.kind == 'session'
+        ):
+            continue
+
+        yield processed_job
+
+
+def get_job_data(
+    username: str, sessions_only: bool = True, limit: int | None = None
+) -> list[ProcessedJob]:
+    processed_jobs = list(iter_job_data(username, sessions_only=sessions_only, limit=limit))
 
     processed_jobs = categorize_and_sort_jobs(processed_jobs)
 
     return processed_jobs
 
 
-def display_jobs(author: str, include_experiments: bool):
-    """Display jobs in a formatted table."""
-    processed_jobs = get_job_data(username=author, sessions_only=not include_experiments)
+def get_detailed_job_data(jobs: list[ProcessedJob]) -> list[ProcessedJob]:
+    """The list endpoint leaves out env vars and port mappings, so re-parse jobs from their details"""
+    details = get_workloads_details([job.id for job in jobs])
 
-    console = Console()
+    detailed_jobs = []
+    for job, detail in zip(jobs, details):
+        if isinstance(detail, BaseException):
+            print(f"Failed to fetch details for {job.id}: {detail}", file=sys.stderr)
+            detailed_jobs.append(job)
+        else:
+            detailed_jobs.append(parse_job_dict(detail))
+    return detailed_jobs
+
+
+def build_jobs_table(processed_jobs: list[ProcessedJob]) -> Table:
     table = Table(header_style="bold", box=None)
 
     table.add_column("ID", style="cyan", no_wrap=True)
@@ -234,20 +276,53 @@ def display_jobs(author: str, include_experiments: bool):
             port_map_str,
         )
 
-    console.print(table)
+    return table
+
+
+def display_jobs(
+    author: str, include_experiments: bool, limit: int | None = None, details: bool = False
+):
+    """Display jobs in a formatted table, drawing rows as each page of jobs arrives."""
+    console = Console()
+    processed_jobs: list[ProcessedJob] = []
+
+    def render():
+        with timed("render table"):
+            live.update(build_jobs_table(categorize_and_sort_jobs(processed_jobs)), refresh=True)
 
+    with Live(build_jobs_table(processed_jobs), console=console, auto_refresh=False) as live:
+        last_refresh = 0.0
+        for job in iter_job_data(author, sessions_only=not include_experiments, limit=limit):
+            processed_jobs.append(job)
+            if time.monotonic() - last_refresh > 0.1:
+                render()
+                last_refresh = time.monotonic()
+        render()
 
+        if details:
+            # Exact hostnames, GPUs and ports are only in per-job details, fetched all at once
+            processed_jobs = get_detailed_job_data(processed_jobs)
+            render()
+
+
+@with_timings
 def sessions():
     """Entry point for listing sessions only."""
     parser = argparse.ArgumentParser(description="List all running sessions on AI2 through Beaker.")
     parser.add_argument(
         "--author", "-a", type=str, default=get_default_user(), help="The username to process."
     )
+    parser.add_argument(
+        "--limit", "-l", type=int, default=None, help="Stop after listing this many jobs."
+    )
+    add_cache_args(parser)
     args = parser.parse_args()
+    apply_cache_args(args)
 
-    display_jobs(args.author, include_experiments=False)
+    display_jobs(args.author, include_experiments=False, limit=args.limit)
 
 
+@with_timings
 def all():
     """Entry point for listing all jobs (sessions and experiments)."""
     parser = argparse.ArgumentParser(
@@ -256,9 +331,18 @@ def all():
     parser.add_argument(
         "--author", "-a", type=str, default=get_default_user(), help="The username to process."
     )
+    parser.add_argument(
+        "--limit", "-l", type=int, default=None, help="Stop after listing this many jobs."
+    )
+    parser.add_argument(
+        "--details", "-d", action="store_true", default=False,
+        help="Fetch every job's details to show exact hostnames, GPUs and ports.",
+    )
+    add_cache_args(parser)
     args = parser.parse_args()
+    apply_cache_args(args)
 
-    display_jobs(args.author, include_experiments=True)
+    display_jobs(args.author, include_experiments=True, limit=args.limit, details=args.details)
 
 
 if __name__ == "__main__":
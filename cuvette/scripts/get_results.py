@@ -2,13 +2,16 @@ import argparse
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List
 
-from beaker import Beaker, BeakerExperiment
+from beaker import BeakerExperiment
 from tqdm import tqdm
 
-from cuvette.utils.general import gather_experiments, get_default_user, ExperimentWithJobs
+from cuvette.utils.clients import get_beaker
+from cuvette.utils.general import add_shard_args, gather_experiments, get_default_user, ExperimentWithJobs
+from cuvette.utils.index import add_index_args
+from cuvette.utils.timings import with_timings
 
 def download_job(job, output_dir):
-    beaker = Beaker.from_env()
+    beaker = get_beaker()
 
     beaker.dataset.fetch(
         dataset=job,
@@ -20,17 +23,18 @@ def download_job(job, output_dir):
 
     return job
 
-def get_results(author, workspace, limit, output_dir):
+def get_results(authors, workspace, limit, output_dir, use_index=True, shards=1):
     experiments: List[ExperimentWithJobs] = gather_experiments(
-        author_list=[author], workspace_name=workspace, limit=limit
+        author_list=authors, workspace_name=workspace, limit=limit, use_index=use_index, shards=shards,
+        finalized=True,  # only finished experiments have results to download
     )
     print(f"Found {len(experiments)} experiments")
 
     jobs = []
     for experiment in experiments:
         for job in experiment.jobs:
-            if job.result and job.result.beaker:
-                jobs += [job.result.beaker]
+            if job.result_dataset_id:
+                jobs += [job.result_dataset_id]
 
     with ThreadPoolExecutor() as executor: # max_workers=32
         futures = [executor.submit(download_job, job, output_dir) for job in jobs]
@@ -43,15 +47,20 @@ def get_results(author, workspace, limit, output_dir):
 
     print('Done!')
 
+@with_timings
 def main():
     parser = argparse.ArgumentParser(description="Analyze logs wtih ChatGPT.")
-    parser.add_argument("-w", "--workspace", type=str, required=True, help="Beaker workspace name")
+    parser.add_argument(
+        "-w", "--workspace", type=str, nargs="+", required=True,
+        help="Beaker workspace name(s), several are crawled concurrently, e.g. -w ai2/a ai2/b.",
+    )
     parser.add_argument(
         "--author",
         "-a",
         type=str,
-        default=get_default_user(),
-        help="Author name to filter experiments by.",
+        nargs="+",
+        default=[get_default_user()],
+        help="Author name(s) to filter experiments by, e.g. -a alice bob carol.",
     )
     parser.add_argument(
         "-l", "--limit", type=int, default=100, help="Maximum number of experiments to check"
@@ -59,6 +68,8 @@ def main():
     parser.add_argument(
         "-o", "--output-dir", type=str, default='workspace', help="The directory to output the results. Defaults to workspace/"
     )
+    add_index_args(parser)
+    add_shard_args(parser)
     args = parser.parse_args()
 
-    get_results(args.author, args.workspace, args.limit, args.output_dir)
+    get_results(args.author, args.workspace, args.limit, args.output_dir, use_index=not args.no_index, shards=args.shards)
@@ -0,0 +1,85 @@
+import argparse
+from datetime import datetime
+from typing import List
+
+from rich.console import Console
+from rich.table import Table
+
+from cuvette.utils.general import ExperimentWithJobs, add_shard_args, gather_experiments, get_default_user
+from cuvette.utils.index import add_index_args
+from cuvette.utils.timings import with_timings
+
+
+def experiment_status(experiment: ExperimentWithJobs) -> str:
+    jobs = experiment.jobs
+    if not jobs:
+        return "[blue]Queued[/blue]"
+    if any(job.finalized is None for job in jobs):
+        return "[blue]Running[/blue]"
+    if any(job.canceled is not None for job in jobs):
+        return "[yellow]Canceled[/yellow]"
+    if any(job.exit_code != 0 for job in jobs):
+        return "[red]Failed[/red]"
+    return "[green]Succeeded[/green]"
+
+
+def display_experiments(experiments: List[ExperimentWithJobs], show_workspace: bool = False):
+    table = Table(header_style="bold", box=None)
+
+    if show_workspace:
+        table.add_column("Workspace", style="blue")
+    table.add_column("ID", style="cyan", no_wrap=True)
+    table.add_column("Name", style="green")
+    table.add_column("Created", style="white")
+    table.add_column("Jobs", style="magenta", justify="right")
+    table.add_column("Status")
+
+    for experiment in experiments:
+        created = datetime.fromtimestamp(experiment.created).strftime("%Y-%m-%d %H:%M:%S")
+        row = [experiment.id, experiment.name, created, str(len(experiment.jobs)), experiment_status(experiment)]
+        table.add_row(*([experiment.workspace] if show_workspace else []), *row)
+
+    Console().print(table)
+
+
+@with_timings
+def main():
+    parser = argparse.ArgumentParser(
+        description="List experiments in a workspace from the local experiment index (synced first unless --offline)."
+    )
+    parser.add_argument(
+        "-w", "--workspace", type=str, nargs="+", required=True,
+        help="Beaker workspace name(s), several are crawled concurrently, e.g. -w ai2/a ai2/b.",
+    )
+    parser.add_argument(
+        "--author",
+        "-a",
+        type=str,
+        nargs="+",
+        default=None,
+        help="Author name(s) to filter experiments by, e.g. -a alice bob carol.",
+    )
+    parser.add_argument(
+        "-l", "--limit", type=int, default=100, help="Maximum number of experiments to list"
+    )
+    parser.add_argument(
+        "--offline", action="store_true", default=False, help="Only read the local index, don't contact Beaker."
+    )
+    add_index_args(parser)
+    add_shard_args(parser)
+    args = parser.parse_args()
+
+    if args.author is None:
+        if args.offline:
+            parser.error("--offline needs an explicit --author")
+        args.author = [get_default_user()]
+
+    experiments = gather_experiments(
+        args.author, args.workspace, limit=args.limit, use_index=not args.no_index, offline=args.offline,
+        shards=args.shards,
+    )
+    display_experiments(experiments, show_workspace=len(args.workspace) > 1)
+
+
+if __name__ == "__main__":
+    main()
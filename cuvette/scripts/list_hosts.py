@@ -1,18 +1,20 @@
 import argparse
 import json
-import subprocess
 from typing import List
 
 from rich.console import Console
 from rich.table import Table
 
+from cuvette.utils.cache import add_cache_args, apply_cache_args, cached_command
+from cuvette.utils.timings import with_timings
+
 
 def get_node_hostnames() -> List[str]:
     """Get a sorted list of all hostnames from beaker nodes."""
     try:
         # Run beaker CLI command to get node list
         cmd = ["beaker", "node", "list", "--format", "json"]
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = cached_command(cmd)
 
         if result.returncode != 0:
             console = Console()
@@ -63,11 +65,14 @@ def display_hostnames_table(hostnames: List[str]):
     console.print(table)
 
 
+@with_timings
 def main():
     parser = argparse.ArgumentParser(
         description="List all hostnames from beaker nodes in sorted order."
     )
+    add_cache_args(parser)
     args = parser.parse_args()
+    apply_cache_args(args)
 
     hostnames = get_node_hostnames()
     
@@ -3,14 +3,15 @@ import os
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor
 
-from beaker import Beaker
 from beaker.exceptions import BeakerPermissionsError
 
 from cuvette.constants.secrets import GENERAL_ENV_SECRETS, GENERAL_FILE_SECRETS, SECRETS_ROOT, USER_ENV_SECRETS, USER_FILE_SECRETS
+from cuvette.utils.clients import get_beaker
+from cuvette.utils.timings import with_timings
 
 
 def create_workspace(name, description=None, public=True):
-    beaker = Beaker.from_env()
+    beaker = get_beaker()
     
     workspace = beaker.workspace.create(
         name,
@@ -20,6 +21,7 @@ def create_workspace(name, description=None, public=True):
     return workspace
 
 
+@with_timings
 def create():
     parser = argparse.ArgumentParser(
         description="Create a workspace."
@@ -78,7 +80,7 @@ def _sync_secret(bk, workspace_name, entry):
 
 
 def sync_secrets(workspace_name, secrets_config):
-    beaker = Beaker.from_env()
+    beaker = get_beaker()
     
     with ThreadPoolExecutor(max_workers=8) as executor:
         futures = []
@@ -91,6 +93,7 @@ def sync_secrets(workspace_name, secrets_config):
             future.result()
 
 
+@with_timings
 def sync():
     parser = argparse.ArgumentParser(
         description="Sync secrets to a Beaker workspace."
@@ -109,6 +112,7 @@ def sync():
         sync_secrets(args.workspace, USER_FILE_SECRETS + USER_ENV_SECRETS)
 
 
+@with_timings
 def list_secrets():
     parser = argparse.ArgumentParser(
         description="List secrets in a Beaker workspace."
@@ -123,7 +127,7 @@ def list_secrets():
 
     workspace_name = args.workspace
 
-    beaker = Beaker.from_env()
+    beaker = get_beaker()
     # Get workspace object first
     workspace = beaker.workspace.get(workspace_name)
     secrets = beaker.secret.list(workspace=workspace)
@@ -136,6 +140,7 @@ def list_secrets():
             print(value)
 
 
+@with_timings
 def copy_secret():
     parser = argparse.ArgumentParser(
         description="Copy a secret from one Beaker workspace to another."
@@ -154,7 +159,7 @@ def copy_secret():
     )
     args = parser.parse_args()
 
-    beaker = Beaker.from_env()
+    beaker = get_beaker()
     
     try:
         # Get workspace objects
@@ -4,12 +4,15 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import asdict, dataclass
 from typing import List, Optional
 
-from beaker import BeakerJob
+from beaker import BeakerWorkloadStatus
 from beaker.exceptions import BeakerError
 from deviousutils.openai import generate_gpt, openai_init
 
 from cuvette.scripts.stream_logs import stream_experiment_logs
-from cuvette.utils.general import gather_experiments, get_default_user, ExperimentWithJobs
+from cuvette.utils.general import add_shard_args, gather_experiments, get_default_user, ExperimentWithJobs
+from cuvette.utils.index import add_index_args
+from cuvette.utils.records import JobRecord
+from cuvette.utils.timings import with_timings
 
 # Pre-defined failure reasons (for vLLM)
 FAILURE_REASONS = """
@@ -46,6 +49,16 @@ ADDITIONAL INSTRUCTIONS:
 MAX_CHARS = 100_000
 
 
+# Experiment statuses that can have a job that exited non-zero, get_failed_logs() picks those out
+FAILED_JOB_STATUSES = [
+    BeakerWorkloadStatus.failed,
+    BeakerWorkloadStatus.canceled,
+    BeakerWorkloadStatus.running,
+    BeakerWorkloadStatus.stopping,
+    BeakerWorkloadStatus.uploading_results,
+]
+
+
 @dataclass
 class JobOutput:
     name: str
@@ -62,10 +75,10 @@ def get_failed_logs(experiment):
     # if 'arc_challenge-mc' not in experiment.name:
     #     return None
 
-    jobs: List[BeakerJob] = experiment.jobs
+    jobs: List[JobRecord] = experiment.jobs
 
     def failed(job):
-        return job.status.exit_code is not None and job.status.exit_code > 0
+        return job.exit_code is not None and job.exit_code > 0
 
     # Only keep failed jobs
     if not any(failed(job) for job in jobs):
@@ -87,11 +100,13 @@ def get_failed_logs(experiment):
     return logs
 
 
-def parse(author, workspace, limit, instructions):
+def parse(authors, workspace, limit, instructions, use_index=True, shards=1):
     openai_init()
 
     experiments: List[ExperimentWithJobs] = gather_experiments(
-        author_list=[author], workspace_name=workspace, limit=limit
+        author_list=authors, workspace_name=workspace, limit=limit, use_index=use_index, shards=shards,
+        # Any experiment that can hold a failed job, including running ones with a failed replica
+        statuses=FAILED_JOB_STATUSES,
     )
     print(f"Found {len(experiments)} experiments")
 
@@ -131,15 +146,20 @@ def parse(author, workspace, limit, instructions):
     )
 
 
+@with_timings
 def main():
     parser = argparse.ArgumentParser(description="Analyze logs wtih ChatGPT.")
-    parser.add_argument("-w", "--workspace", type=str, required=True, help="Beaker workspace name")
+    parser.add_argument(
+        "-w", "--workspace", type=str, nargs="+", required=True,
+        help="Beaker workspace name(s), several are crawled concurrently, e.g. -w ai2/a ai2/b.",
+    )
     parser.add_argument(
         "--author",
         "-a",
         type=str,
-        default=get_default_user(),
-        help="Author name to filter experiments by.",
+        nargs="+",
+        default=[get_default_user()],
+        help="Author name(s) to filter experiments by, e.g. -a alice bob carol.",
     )
     parser.add_argument(
         "-l", "--limit", type=int, default=100, help="Maximum number of experiments to check"
@@ -151,6 +171,8 @@ def main():
         default="",
         help="Additional instructions to the prompt when parsing the errors in the logs",
     )
+    add_index_args(parser)
+    add_shard_args(parser)
     args = parser.parse_args()
 
-    parse(args.author, args.workspace, args.limit, args.prompt)
+    parse(args.author, args.workspace, args.limit, args.prompt, use_index=not args.no_index, shards=args.shards)
@@ -1,68 +1,95 @@
-import time
-from typing import List
+import contextlib
+from typing import Iterator
 
-from beaker import Beaker, BeakerExperiment
-from beaker.exceptions import BeakerError
+from beaker import BeakerExperiment, BeakerWorkloadStatus
 
-from cuvette.utils.general import gather_experiments, get_default_user, ExperimentWithJobs
+from cuvette.utils.bulk import BulkExecutor
+from cuvette.utils.clients import get_beaker, rpc_count
+from cuvette.utils.general import add_shard_args, iter_experiments, get_default_user, ExperimentWithJobs
+from cuvette.utils.index import ExperimentIndex, add_index_args
+from cuvette.utils.journal import Journal, add_journal_args
+from cuvette.utils.timings import with_timings
 
 
 def beaker_experiment_failed(exp):
     """Returns if beaker experiment failed."""
-    if exp.jobs[0].execution.spec.replicas is not None:
-        num_replicas = exp.jobs[0].execution.spec.replicas
-    else:
-        num_replicas = 1
+    num_replicas = exp.jobs[0].replicas
 
     checks = []
     for job in exp.jobs:
-        if job.status.exited is None:
+        if job.exited is None:
             return False  # at least one job is still running
-        checks.append(job.status.finalized is not None and job.status.exit_code == 0)
+        checks.append(job.finalized is not None and job.exit_code == 0)
 
     return sum(checks) != num_replicas
 
 
-def restart_jobs(author, workspace, limit=5000):
-    beaker = Beaker.from_env()
-    experiments: List[ExperimentWithJobs] = gather_experiments(
-        [author],
-        workspace_name=workspace,
-        limit=limit,
-    )
-    experiments = [exp for exp in experiments if beaker_experiment_failed(exp)]
-    print(f"Found {len(experiments)} failed experiments")
+def restart_jobs(authors, workspace, limit=5000, use_index=True, shards=1, resume=False):
+    beaker = get_beaker()
+
+    def list_failed() -> Iterator[ExperimentWithJobs]:
+        # Restart failed experiments as they are listed, instead of waiting for the whole workspace
+        experiments = iter_experiments(
+            authors,
+            workspace_name=workspace,
+            limit=limit,
+            use_index=use_index,
+            shards=shards,
+            # A superset of beaker_experiment_failed(), which also restarts canceled and preempted experiments
+            statuses=[BeakerWorkloadStatus.failed, BeakerWorkloadStatus.canceled],
+        )
+        return (exp for exp in experiments if beaker_experiment_failed(exp))
+
+    def restart(experiment_id: str):
+        # An ID is resolved without a lookup, so this is the only RPC per experiment. A second
+        # restart would kill the jobs the first one started, hence idempotent=False below
+        beaker.experiment.restart_tasks(experiment_id)
 
-    for i, experiment in enumerate(experiments):
-        try:
-            workload = beaker.workload.get(experiment.id)
-            beaker.workload.restart_tasks(workload)
-        except BeakerError as e:
-            print(f"Failed to restart https://beaker.org/ex/{experiment.id}: {e}")
-            continue
+    # Restarts run concurrently, backing off when Beaker reports overload instead of pausing every 200
+    num_failed = 0
+    journal = Journal("brestart", dict(authors=authors, workspace=workspace, limit=limit), resume=resume)
+    # --no-index leaves the index file alone, it isn't even opened
+    with journal, (ExperimentIndex() if use_index else contextlib.nullcontext()) as index:
+        experiment_ids = (experiment_id for experiment_id, _ in journal.pending(list_failed))
+        for i, result in enumerate(BulkExecutor(restart, "restarted", idempotent=False).run(experiment_ids)):
+            num_failed += 1
+            # Restarted experiments get new jobs, re-fetch them on the next sync
+            if index is not None:
+                index.mark_stale([result.item])
+            if result.error is not None:
+                journal.fail(result.item, result.error)
+                print(f"Failed to restart https://beaker.org/ex/{result.item}: {result.error}")
+                continue
 
-        print(f"({i+1}/{len(experiments)}) Restarted https://beaker.org/ex/{experiment.id})")
+            journal.complete(result.item)
+            print(f"({i+1}) Restarted https://beaker.org/ex/{result.item})")
 
-        if (i + 1) % 200 == 0:
-            print("Giving the Beaker API a 20s breather to prevent overloding and timeouts...")
-            time.sleep(20)
+    print(f"Found {num_failed} failed experiments ({rpc_count()} RPCs)")
 
 
+@with_timings
 def main():
     import argparse
 
     parser = argparse.ArgumentParser()
-    parser.add_argument("-w", "--workspace", type=str, required=True, help="Beaker workspace name")
+    parser.add_argument(
+        "-w", "--workspace", type=str, nargs="+", required=True,
+        help="Beaker workspace name(s), several are crawled concurrently, e.g. -w ai2/a ai2/b.",
+    )
     parser.add_argument(
         "--author",
         "-a",
         type=str,
-        default=get_default_user(),
-        help="Author name to filter experiments by.",
+        nargs="+",
+        default=[get_default_user()],
+        help="Author name(s) to filter experiments by, e.g. -a alice bob carol.",
     )
     parser.add_argument(
         "-l", "--limit", type=int, default=5000, help="Maximum number of experiments to check"
     )
+    add_index_args(parser)
+    add_shard_args(parser)
+    add_journal_args(parser)
     args = parser.parse_args()
 
-    restart_jobs(args.author, args.workspace, args.limit)
+    restart_jobs(args.author, args.workspace, args.limit, use_index=not args.no_index, shards=args.shards, resume=args.resume)
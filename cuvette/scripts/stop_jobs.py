@@ -1,36 +1,57 @@
-import time
-from typing import List
+import contextlib
+from typing import Iterator
 
-from beaker import Beaker, BeakerExperiment
-from beaker.exceptions import BeakerError
+from beaker import BeakerExperiment
 
-from cuvette.utils.general import gather_experiments, get_default_user, ExperimentWithJobs
+from cuvette.utils.bulk import BulkExecutor
+from cuvette.utils.clients import get_beaker, rpc_count
+from cuvette.utils.general import add_shard_args, iter_experiments, get_default_user, ExperimentWithJobs
+from cuvette.utils.index import ExperimentIndex, add_index_args
+from cuvette.utils.journal import Journal, add_journal_args
+from cuvette.utils.timings import with_timings
 
 
-def stop_jobs(author, workspace, limit=5000):
-    beaker = Beaker.from_env()
-    experiments: List[ExperimentWithJobs] = gather_experiments(
-        [author],
-        workspace_name=workspace,
-        limit=limit,
-    )
-    print(f"Found {len(experiments)} failed experiments")
+def stop_jobs(authors, workspace, limit=5000, use_index=True, shards=1, resume=False):
+    beaker = get_beaker()
+
+    def list_experiments() -> Iterator[ExperimentWithJobs]:
+        # Stop experiments as they are listed, instead of waiting for the whole workspace
+        return iter_experiments(
+            authors,
+            workspace_name=workspace,
+            limit=limit,
+            use_index=use_index,
+            shards=shards,
+            finalized=False,  # finished experiments have nothing to stop
+            lazy_jobs=True,  # experiments are canceled by ID, their jobs are never read
+        )
+
+    def stop(experiment_id: str):
+        # An ID is resolved without a lookup, so this is the only RPC per experiment
+        beaker.workload.cancel(experiment_id)
 
-    for i, experiment in enumerate(experiments):
-        try:
-            workload = beaker.workload.get(experiment.id)
-            beaker.workload.cancel(workload)
-        except BeakerError as e:
-            print(f"Failed to stop https://beaker.org/ex/{experiment.id}: {e}")
-            continue
+    # Cancels run concurrently, backing off when Beaker reports overload instead of pausing every 200
+    num_experiments = 0
+    journal = Journal("bstop", dict(authors=authors, workspace=workspace, limit=limit), resume=resume)
+    # --no-index leaves the index file alone, it isn't even opened
+    with journal, (ExperimentIndex() if use_index else contextlib.nullcontext()) as index:
+        experiment_ids = (experiment_id for experiment_id, _ in journal.pending(list_experiments))
+        for i, result in enumerate(BulkExecutor(stop, "stopped").run(experiment_ids)):
+            num_experiments += 1
+            if index is not None:
+                index.mark_stale([result.item])
+            if result.error is not None:
+                journal.fail(result.item, result.error)
+                print(f"Failed to stop https://beaker.org/ex/{result.item}: {result.error}")
+                continue
 
-        print(f"({i+1}/{len(experiments)}) stopped https://beaker.org/ex/{experiment.id})")
+            journal.complete(result.item)
+            print(f"({i+1}) stopped https://beaker.org/ex/{result.item})")
 
-        if (i + 1) % 200 == 0:
-            print("Giving the Beaker API a 20s breather to prevent overloding and timeouts...")
-            time.sleep(20)
+    print(f"Found {num_experiments} experiments ({rpc_count()} RPCs)")
 
 
+@with_timings
 def main():
     import argparse
 
@@ -39,13 +60,20 @@ def main():
         "--author",
         "-a",
         type=str,
-        default=get_default_user(),
-        help="Author name to filter experiments by.",
+        nargs="+",
+        default=[get_default_user()],
+        help="Author name(s) to filter experiments by, e.g. -a alice bob carol.",
+    )
+    parser.add_argument(
+        "-w", "--workspace", type=str, nargs="+", required=True,
+        help="Beaker workspace name(s), several are crawled concurrently, e.g. -w ai2/a ai2/b.",
     )
-    parser.add_argument("-w", "--workspace", type=str, required=True, help="Beaker workspace name")
     parser.add_argument(
         "-l", "--limit", type=int, default=100, help="Maximum number of experiments to check"
     )
+    add_index_args(parser)
+    add_shard_args(parser)
+    add_journal_args(parser)
     args = parser.parse_args()
 
-    stop_jobs(args.author, args.workspace, args.limit)
+    stop_jobs(args.author, args.workspace, args.limit, use_index=not args.no_index, shards=args.shards, resume=args.resume)
@@ -1,9 +1,12 @@
 import argparse
 import sys
 
-from beaker import Beaker, BeakerJob
+from beaker import BeakerJob
 from beaker.exceptions import BeakerJobNotFound
 
+from cuvette.utils.clients import get_beaker
+from cuvette.utils.timings import with_timings
+
 
 def parse_job_id(job_id: str) -> str:
     """
@@ -29,7 +32,7 @@ def parse_job_id(job_id: str) -> str:
 
 
 def stream_experiment_logs(job_id: str, do_stream: bool, return_logs: bool = False):
-    beaker = Beaker.from_env()
+    beaker = get_beaker()
 
     try:
         job: BeakerJob = beaker.job.get(job_id)
@@ -110,6 +113,7 @@ def main():
     stream_experiment_logs(job_id, do_stream=args.stream)
 
 
+@with_timings
 def logs():
     parser = argparse.ArgumentParser(description="Get logs from a Beaker job")
     parser.add_argument("job_id", help="The ID or name of the Beaker job")
@@ -120,6 +124,7 @@ def logs():
     stream_experiment_logs(job_id, do_stream=False)
 
 
+@with_timings
 def stream():
     parser = argparse.ArgumentParser(description="Stream logs from a Beaker job")
     parser.add_argument("job_id", help="The ID or name of the Beaker job")
@@ -3,8 +3,10 @@ from pathlib import Path
 
 from grpc import server
 
-from cuvette.scripts.get_jobs import ProcessedJob, get_job_data, get_workload_details, parse_job_dict
+from cuvette.scripts.get_jobs import ProcessedJob, get_detailed_job_data, get_job_data
+from cuvette.utils.cache import add_cache_args, apply_cache_args
 from cuvette.utils.general import get_default_user, run_command
+from cuvette.utils.timings import with_timings
 
 SSH_USER = "davidh"
 
@@ -40,9 +42,12 @@ def get_host(session_id=None):
         # Find the session with matching id
         for _session in session_data:
             if _session.id == session_id:
-                session = _session
+                session = get_detailed_job_data([_session])[0]
                 break
     else:
+        # Fetch details for every candidate at once (the listing has no hostnames, GPUs or ports)
+        session_data = get_detailed_job_data(session_data)
+
         # Filter out sessions where session.kind == 'execution' but session.cuvette_port is None
         session_data = [
             s for s in session_data 
@@ -59,11 +64,7 @@ def get_host(session_id=None):
         
     if session is None:
         raise RuntimeError(f"No session found with id: {session_id}")
-    
-    # Fetch job details
-    detailed_job = get_workload_details(session.id)
-    session = parse_job_dict(detailed_job)
-    
+
     host_name = session.hostname
     
     if not host_name:
@@ -190,12 +191,15 @@ def open_ssh_tunnel():
     run_command("ssh -MNf ai2")
 
 
+@with_timings
 def main():
     parser = argparse.ArgumentParser(description="Update SSH port configuration for Beaker session")
     parser.add_argument(
         "session_id", type=str, nargs="?", default=None, help="Beaker session ID to update port for"
     )
+    add_cache_args(parser)
     args = parser.parse_args()
+    apply_cache_args(args)
 
     host_name, server_port = get_host(args.session_id)
     update_ssh_config(host_name, server_port)
@@ -8,7 +8,6 @@ from typing import Callable, Generator, Optional, Union
 
 from typing import Optional
 from beaker import (
-    Beaker,
     BeakerTaskSpec,
     BeakerImageSource,
     BeakerResultSpec,
@@ -23,6 +22,7 @@ from beaker import (
     BeakerWorkloadStatus
 )
 
+from cuvette.utils.clients import get_beaker
 from cuvette.utils.general import send_notification
 from cuvette.constants.secrets import USER_ENV_SECRETS, USER_FILE_SECRETS
 
@@ -35,7 +35,7 @@ SESSION_BUDGET = "ai2/oe-base"
 
 ENTRYPOINT = "/entrypoint.sh"
 
-UPDATE_PORT_CMD = "bport {session_id}"
+UPDATE_PORT_CMD = "bport {session_id} --no-cache" # the session was just created, so never trust a cached listing
 
 
 """
@@ -372,12 +372,12 @@ class ExperimentLauncher(Launcher):
 
         suffix = "".join(random.choices(string.ascii_lowercase + string.digits, k=4))
 
-        with Beaker.from_env() as beaker:
-            workload = beaker.experiment.create(
-                spec=experiment, 
-                name=session_name + "-" + suffix,
-                workspace=workspace
-            )
+        beaker = get_beaker()
+        workload = beaker.experiment.create(
+            spec=experiment, 
+            name=session_name + "-" + suffix,
+            workspace=workspace
+        )
 
         return workload
 
@@ -394,47 +394,47 @@ class ExperimentLauncher(Launcher):
             shared_memory=self.shared_memory,
         )
 
-        with Beaker.from_env() as beaker:
+        beaker = get_beaker()
+        job = beaker.workload.get_latest_job(self._workload)
+        yield f"Starting session {job.id}" # needed for bport
+        yield f"Starting job: \033[33m{beaker.workload.url(self._workload)}\033[00m"
+
+        job = None
+        while job is None:
+            yield "Waiting for scheduler..."
             job = beaker.workload.get_latest_job(self._workload)
-            yield f"Starting session {job.id}" # needed for bport
-            yield f"Starting job: \033[33m{beaker.workload.url(self._workload)}\033[00m"
-
-            job = None
-            while job is None:
-                yield "Waiting for scheduler..."
-                job = beaker.workload.get_latest_job(self._workload)
-                if job is None:
-                    time.sleep(0.5)
-
-            last_status = None
-            while True:
-                job = beaker.workload.get_latest_job(self._workload)
-                if job is None:
-                    time.sleep(0.5)
-                    continue
-
-                current_status = job.status.status
-
-                if current_status != last_status:
-                    status_name = BeakerWorkloadStatus(current_status).name
-                    yield f"Status: \033[33m{status_name}\033[00m"
-                    last_status = current_status
-
-                if current_status == BeakerWorkloadStatus.running:
-                    self._job = job
-                    yield "Started!"
-                    break
-
-                if current_status in (
-                    BeakerWorkloadStatus.succeeded,
-                    BeakerWorkloadStatus.failed,
-                    BeakerWorkloadStatus.canceled,
-                ):
-                    self._job = job
-                    yield f"Job ended with status: {BeakerWorkloadStatus(current_status).name}"
-                    break
+            if job is None:
+                time.sleep(0.5)
 
+        last_status = None
+        while True:
+            job = beaker.workload.get_latest_job(self._workload)
+            if job is None:
                 time.sleep(0.5)
+                continue
+
+            current_status = job.status.status
+
+            if current_status != last_status:
+                status_name = BeakerWorkloadStatus(current_status).name
+                yield f"Status: \033[33m{status_name}\033[00m"
+                last_status = current_status
+
+            if current_status == BeakerWorkloadStatus.running:
+                self._job = job
+                yield "Started!"
+                break
+
+            if current_status in (
+                BeakerWorkloadStatus.succeeded,
+                BeakerWorkloadStatus.failed,
+                BeakerWorkloadStatus.canceled,
+            ):
+                self._job = job
+                yield f"Job ended with status: {BeakerWorkloadStatus(current_status).name}"
+                break
+
+            time.sleep(0.5)
 
     def on_complete(
         self, returncode: int, output_lines: list[str], session_id: str
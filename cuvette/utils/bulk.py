@@ -0,0 +1,226 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Generic, Iterable, Iterator, Optional, Set, TypeVar
+
+import grpc
+import requests
+from beaker.exceptions import BeakerServerError, BeakerServerUnavailableError
+
+from cuvette.utils.poormansbeaker import RETRY_STATUSES
+
+T = TypeVar("T")
+
+# gRPC's equivalents of 429 and 5xx, for errors beaker-py doesn't wrap
+OVERLOAD_CODES = {
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.INTERNAL,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+}
+
+# The subset that means the server turned the request away without acting on it
+REJECTED_CODES = {grpc.StatusCode.RESOURCE_EXHAUSTED, grpc.StatusCode.UNAVAILABLE}
+REJECTED_STATUSES = {429, 503}
+
+
+def is_overloaded(e: BaseException) -> bool:
+    """Whether an error says the server is struggling (429, 5xx or their gRPC codes), rather than the request was bad"""
+    if isinstance(e, BeakerServerError):
+        return True
+    if isinstance(e, grpc.Call):
+        return e.code() in OVERLOAD_CODES
+    if isinstance(e, requests.HTTPError) and e.response is not None:
+        return e.response.status_code in RETRY_STATUSES
+    return isinstance(e, (requests.ConnectionError, requests.Timeout))
+
+
+def is_rejected(e: BaseException) -> bool:
+    """Whether an overload error means the request was never applied, so even a non-idempotent one can be repeated"""
+    if isinstance(e, BeakerServerUnavailableError):
+        return True
+    if isinstance(e, grpc.Call):
+        return e.code() in REJECTED_CODES
+    if isinstance(e, requests.HTTPError) and e.response is not None:
+        return e.response.status_code in REJECTED_STATUSES
+    return isinstance(e, requests.ConnectTimeout)
+
+
+class AIMDLimiter:
+    """
+    A concurrency limit that grows by `increase` per limit's worth of healthy calls (additive
+    increase) and is cut by `decrease` when a call reports overload or latency rises past
+    `latency_factor` x the best smoothed latency seen (multiplicative decrease). A cut only
+    happens once per round of in-flight calls, so one burst of errors doesn't collapse it.
+    """
+    def __init__(
+        self,
+        initial: int = 8,
+        minimum: int = 1,
+        maximum: int = 64,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_factor: float = 2.0,
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.in_flight = 0
+        self.latency: Optional[float] = None  # smoothed
+        self.best_latency: Optional[float] = None
+        self._last_cut = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> float:
+        """Wait for a free slot, returns the start time to hand back to release()"""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+        return time.monotonic()
+
+    def release(self, started: float, overloaded: bool = False):
+        seconds = time.monotonic() - started
+        with self._condition:
+            self.in_flight -= 1
+            if not overloaded:
+                self.latency = seconds if self.latency is None else 0.9 * self.latency + 0.1 * seconds
+                self.best_latency = self.latency if self.best_latency is None else min(self.best_latency, self.latency)
+            slow = (
+                self.latency is not None
+                and self.best_latency is not None
+                and self.latency > self.latency_factor * self.best_latency
+            )
+            if overloaded or slow:
+                # Calls that started before the last cut already saw the old limit
+                if started >= self._last_cut:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self._last_cut = time.monotonic()
+                    if slow:
+                        self.best_latency = self.latency  # the new limit sets the new baseline
+            else:
+                self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+            self._condition.notify_all()
+
+
+@dataclass
+class BulkResult(Generic[T]):
+    item: T
+    value: Any = None
+    error: Optional[BaseException] = None
+    attempts: int = 1
+    overloads: int = 0  # attempts that failed with an overload error
+
+
+class BulkExecutor(Generic[T]):
+    """
+    Runs `action` over many items on a worker pool whose concurrency is set by an AIMDLimiter.
+    Calls failing with an overload error are retried with jittered backoff, others are reported
+    as they are. Pass `idempotent=False` for actions that mustn't run twice: those are only retried
+    when the server rejected the call outright (is_rejected), not after an internal error or a
+    timeout that may have applied it. Results come back in completion order, with a throughput line every `report_every`
+    seconds, e.g. `for result in BulkExecutor(cancel, "stopped").run(experiments):`.
+    """
+    def __init__(
+        self,
+        action: Callable[[T], Any],
+        label: str = "done",
+        limiter: Optional[AIMDLimiter] = None,
+        retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        report_every: Optional[float] = 5.0,
+        idempotent: bool = True,
+    ):
+        self.action = action
+        self.label = label
+        self.limiter = limiter or AIMDLimiter()
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.report_every = report_every
+        self.idempotent = idempotent
+        self.completed = 0
+        self.failed = 0
+        self.overloads = 0  # overload errors seen, including the ones retried away
+        self._started: Optional[float] = None
+        self._recent: Deque[float] = deque()  # completion times in the last few seconds, for the live rate
+        self._last_report = 0.0
+
+    def _attempt(self, item: T) -> BulkResult[T]:
+        attempt = overloads = 0
+        while True:
+            started = self.limiter.acquire()
+            try:
+                value = self.action(item)
+            except Exception as e:
+                overloaded = is_overloaded(e)
+                self.limiter.release(started, overloaded=overloaded)
+                if not overloaded:
+                    return BulkResult(item, error=e, attempts=attempt + 1, overloads=overloads)
+                overloads += 1
+                if attempt >= self.retries or not (self.idempotent or is_rejected(e)):
+                    return BulkResult(item, error=e, attempts=attempt + 1, overloads=overloads)
+                time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt)))
+                attempt += 1
+            else:
+                self.limiter.release(started)
+                return BulkResult(item, value=value, attempts=attempt + 1, overloads=overloads)
+
+    @property
+    def rate(self) -> float:
+        """Actions per second over the last 10 seconds"""
+        now = time.monotonic()
+        while self._recent and self._recent[0] < now - 10:
+            self._recent.popleft()
+        window = min(10.0, now - self._started) if self._started is not None else 0.0
+        return len(self._recent) / window if window > 0 else 0.0
+
+    def _record(self, result: BulkResult):
+        self.completed += 1
+        self.failed += result.error is not None
+        self.overloads += result.overloads
+        self._recent.append(time.monotonic())
+        if self.report_every is not None and time.monotonic() - self._last_report >= self.report_every:
+            self._last_report = time.monotonic()
+            self.report()
+
+    def report(self):
+        elapsed = time.monotonic() - self._started if self._started is not None else 0.0
+        print(
+            f"[{self.completed} {self.label}, {self.failed} failed in {elapsed:.0f}s] "
+            f"{self.rate:.1f}/s, concurrency {int(self.limiter.limit)}, {self.overloads} overload errors"
+        )
+
+    def _finished(self, pending: Set[Future], block: bool) -> Iterator[BulkResult]:
+        done = wait(pending, return_when=FIRST_COMPLETED)[0] if block else {f for f in pending if f.done()}
+        for future in done:
+            pending.discard(future)
+            result = future.result()
+            self._record(result)
+            yield result
+
+    def run(self, items: Iterable[T]) -> Iterator[BulkResult]:
+        self._started = self._last_report = time.monotonic()
+        pending: Set[Future] = set()
+        # Workers block in the limiter, so the pool only caps how far submission runs ahead of it
+        with ThreadPoolExecutor(max_workers=self.limiter.maximum) as executor:
+            try:
+                for item in items:
+                    yield from self._finished(pending, block=False)
+                    while len(pending) >= self.limiter.maximum:
+                        yield from self._finished(pending, block=True)
+                    pending.add(executor.submit(self._attempt, item))
+                while pending:
+                    yield from self._finished(pending, block=True)
+            finally:
+                for future in pending:
+                    future.cancel()
+        if self.report_every is not None:
+            self.report()
@@ -0,0 +1,247 @@
+import argparse
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from cuvette.utils.timings import timed
+
+CACHE_DIR = Path(os.environ.get("CUVETTE_CACHE_DIR", Path.home() / ".cache" / "cuvette"))
+
+# Seconds an entry stays fresh, matched by the longest key prefix
+DEFAULT_TTLS: Dict[str, float] = {
+    "GET users/": 24 * 60 * 60,
+    "GET jobs/": 15,
+    "GET jobs": 15,
+    "beaker cluster free-slots": 30,
+    "beaker node list": 10 * 60,
+}
+DEFAULT_TTL = 15
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Running total of the entries' size, kept next to the lock
+MANIFEST = ".manifest.json"
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    created: float
+    value: Any
+    fresh: bool
+
+
+class ResponseCache:
+    """
+    A small on-disk cache shared by every cuvette process. Entries are JSON files written
+    atomically, guarded by an flock so concurrent commands don't trample each other. Once the
+    cache grows past `max_bytes`, expired entries are swept and then the least recently used.
+    """
+    def __init__(
+        self,
+        root: Path = CACHE_DIR / "responses",
+        ttls: Optional[Dict[str, float]] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        enabled: bool = True,
+        max_age: Optional[float] = None,
+    ):
+        self.root = Path(root)
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.max_age = max_age  # overrides every TTL when set (e.g. --max-age 0)
+
+    def ttl_for(self, key: str) -> float:
+        ttl = self._entry_ttl(key)
+        if self.max_age is not None:
+            ttl = min(ttl, self.max_age)
+        return ttl
+
+    def _entry_ttl(self, key: str) -> float:
+        """The TTL from the table alone, so a run with --max-age 0 doesn't sweep everyone's entries"""
+        matches = [prefix for prefix in self.ttls if key.startswith(prefix)]
+        return self.ttls[max(matches, key=len)] if matches else DEFAULT_TTL
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return self.root / digest[:2] / f"{digest}.json"
+
+    @contextlib.contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / ".lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def lookup(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for a key, fresh or stale (stale entries are still useful validators)"""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with self._locked(exclusive=False):
+                with open(path) as f:
+                    data = json.load(f)
+                os.utime(path)  # bump recency for LRU eviction
+        except (OSError, ValueError):
+            return None
+        if data.get("key") != key:
+            return None
+        fresh = time.time() - data["created"] <= self.ttl_for(key)
+        return CacheEntry(key=key, created=data["created"], value=data["value"], fresh=fresh)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.lookup(key)
+        if entry is None or not entry.fresh:
+            return None
+        return entry.value
+
+    def set(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        path = self._path(key)
+        payload = json.dumps({"key": key, "created": time.time(), "value": value})
+        try:
+            with self._locked(exclusive=True):
+                path.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    replaced = path.stat().st_size
+                except OSError:
+                    replaced = 0
+                with tempfile.NamedTemporaryFile("w", dir=path.parent, delete=False) as f:
+                    f.write(payload)
+                os.replace(f.name, path)
+                # A running total in the manifest, so a write only scans the cache once it's over the cap
+                total = self._read_total()
+                total = self._scan_total() if total is None else total + len(payload.encode()) - replaced
+                if total > self.max_bytes:
+                    total = self._sweep()
+                self._write_total(total)
+        except OSError:
+            pass  # the cache is best-effort, never fail a command because of it
+
+    def _read_total(self) -> Optional[int]:
+        try:
+            with open(self.root / MANIFEST) as f:
+                return int(json.load(f)["bytes"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None  # missing or cut short, recount
+
+    def _write_total(self, total: int):
+        with open(self.root / MANIFEST, "w") as f:
+            json.dump({"bytes": total}, f)
+
+    def _scan_total(self) -> int:
+        total = 0
+        for path in self.root.glob("*/*.json"):
+            try:
+                total += path.stat().st_size
+            except OSError:
+                continue
+        return total
+
+    def _sweep(self) -> int:
+        """
+        Drop expired entries, then least-recently-used ones until the cache fits again, and return
+        its size (caller holds the write lock).
+        """
+        entries = []
+        total = 0
+        now = time.time()
+        for path in self.root.glob("*/*.json"):
+            try:
+                stat = path.stat()
+                with open(path) as f:
+                    data = json.load(f)
+                expired = now - data["created"] > self._entry_ttl(data["key"])
+            except OSError:
+                continue
+            except (ValueError, KeyError, TypeError):
+                expired = True  # unreadable
+            if expired:
+                path.unlink(missing_ok=True)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        if total <= self.max_bytes:
+            return total
+        for _, size, path in sorted(entries):
+            path.unlink(missing_ok=True)
+            total -= size
+            if total <= self.max_bytes * 0.9:
+                break
+        return total
+
+    def clear(self):
+        with self._locked(exclusive=True):
+            for path in self.root.glob("*/*.json"):
+                path.unlink(missing_ok=True)
+            self._write_total(0)
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_cache() -> ResponseCache:
+    """The process-wide cache, configured from CUVETTE_NO_CACHE / CUVETTE_CACHE_MAX_AGE"""
+    global _cache
+    if _cache is None:
+        max_age = os.environ.get("CUVETTE_CACHE_MAX_AGE")
+        _cache = ResponseCache(
+            enabled=not os.environ.get("CUVETTE_NO_CACHE"),
+            max_age=float(max_age) if max_age else None,
+        )
+    return _cache
+
+
+def add_cache_args(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--no-cache", action="store_true", default=False, help="Ignore and don't write the local response cache."
+    )
+    parser.add_argument(
+        "--max-age", type=float, default=None, help="Only reuse cached responses younger than this many seconds."
+    )
+
+
+def apply_cache_args(args: argparse.Namespace):
+    cache = get_cache()
+    if args.no_cache:
+        cache.enabled = False
+        # The name -> ID cache too (imported here, as the resolver builds on this module)
+        from cuvette.utils.resolver import get_resolver
+
+        get_resolver().cache.enabled = False
+    if args.max_age is not None:
+        cache.max_age = args.max_age
+
+
+def cached_command(cmd: List[str]) -> subprocess.CompletedProcess:
+    """subprocess.run() for read-only CLI calls, e.g. `beaker node list`. Only successes are cached."""
+    cache = get_cache()
+    key = " ".join(cmd)
+    name = "cli " + " ".join(cmd[:3])
+    stdout = None
+    if cache.enabled:
+        with timed(f"{name} (disk cache)"):
+            stdout = cache.get(key)
+    if stdout is not None:
+        return subprocess.CompletedProcess(cmd, 0, stdout=stdout, stderr="")
+
+    with timed(name) as span:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        span.bytes = len(result.stdout)
+        span.error = result.returncode != 0
+    if result.returncode == 0:
+        cache.set(key, result.stdout)
+    return result
@@ -0,0 +1,102 @@
+import atexit
+import threading
+from typing import Callable, Optional
+
+from beaker import Beaker
+
+from cuvette.utils.timings import TIMINGS, timed
+
+# Prefix of the TIMINGS endpoints counting each gRPC call, e.g. "rpc CancelWorkloads"
+RPC_PREFIX = "rpc "
+
+_lock = threading.Lock()
+_beaker: Optional[Beaker] = None
+
+
+class _CountedMethod:
+    """
+    A stub method that records each call in TIMINGS. Streaming calls are timed until the stream
+    opens. Everything else (e.g. `_method`, which beaker-py logs) is passed through.
+    """
+    def __init__(self, name: str, method: Callable):
+        self._endpoint = RPC_PREFIX + name
+        self._multicallable = method
+
+    def __call__(self, request, **kwargs):
+        with TIMINGS.timed(self._endpoint):
+            return self._multicallable(request, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self._multicallable, name)
+
+
+class _CountingStub:
+    """
+    Wraps a BeakerStub so every RPC is counted. A `grpc.intercept_channel` would be the usual
+    way, but beaker-py reads the method name off the callables it makes and those don't have it.
+    """
+    def __init__(self, stub):
+        self._stub = stub
+
+    def __getattr__(self, name: str):
+        method = _CountedMethod(name, getattr(self._stub, name))
+        setattr(self, name, method)
+        return method
+
+
+def rpc_count() -> int:
+    """gRPC calls made so far through clients from get_beaker() (0 if this beaker-py can't be counted)"""
+    return TIMINGS.calls(RPC_PREFIX)
+
+
+def _warm(beaker: Beaker):
+    """
+    Create the gRPC channel and start connecting in the background, so the first RPC doesn't pay
+    for it, and count its RPCs from then on. Both reach into beaker-py's private `_service` and
+    `_channel`, so a release that renames them gets a plain, uncounted client instead of a crash.
+    """
+    service = beaker.service
+    if not isinstance(service, _CountingStub) and getattr(beaker, "_service", None) is service:
+        beaker._service = _CountingStub(service)
+    subscribe = getattr(getattr(beaker, "_channel", None), "subscribe", None)
+    if subscribe is not None:
+        subscribe(lambda state: None, try_to_connect=True)
+
+
+def get_beaker() -> Beaker:
+    """
+    The process-wide Beaker client. The first call reads the config and opens the gRPC channel,
+    every later call (from any thread) gets the same client and its already connected channel.
+    Don't use it as a context manager, that would close the channel under everyone else.
+    """
+    global _beaker
+    if _beaker is None:
+        with _lock:
+            if _beaker is None:
+                with timed("auth Beaker.from_env"):
+                    beaker = Beaker.from_env()
+                _warm(beaker)
+                _beaker = beaker
+    return _beaker
+
+
+def set_beaker(beaker: Beaker):
+    """Hand out `beaker` from get_beaker() from now on, e.g. a client pointed at a stand-in server"""
+    global _beaker
+    with _lock:
+        if _beaker is not None and _beaker is not beaker:
+            _beaker.close()
+        _warm(beaker)
+        _beaker = beaker
+
+
+def close_beaker():
+    """Close the shared client's channel, the next get_beaker() opens a new one"""
+    global _beaker
+    with _lock:
+        if _beaker is not None:
+            _beaker.close()
+        _beaker = None
+
+
+atexit.register(close_beaker)
@@ -1,30 +1,44 @@
+import argparse
+import functools
 import os
+import queue
 import subprocess
-from typing import List
-
-from beaker import Beaker, BeakerExperiment, BeakerJob, BeakerWorkloadType
-
-
-class ExperimentWithJobs:
-    """Wrapper class to attach jobs to an experiment object (exists because Beaker's protobuf is immutable)"""
-    def __init__(self, experiment: BeakerExperiment, jobs: List[BeakerJob]):
-        self._experiment = experiment
-        self.jobs = jobs
-    
-    def __getattr__(self, name):
-        # Delegate all other attribute access to the underlying experiment
-        return getattr(self._experiment, name)
-    
-    @property
-    def id(self):
-        return self._experiment.id
-    
-    @property
-    def name(self):
-        # Try to get name from experiment, fallback to id if not available
-        if hasattr(self._experiment, 'name'):
-            return self._experiment.name
-        return self._experiment.id
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from beaker import (
+    Beaker,
+    BeakerJob,
+    BeakerOrganization,
+    BeakerSortOrder,
+    BeakerTask,
+    BeakerUser,
+    BeakerWorkload,
+    BeakerWorkloadStatus,
+    BeakerWorkloadType,
+    BeakerWorkspace,
+)
+from beaker.exceptions import BeakerNotFoundError
+from rich.progress import Progress, SpinnerColumn, TextColumn
+
+from cuvette.utils.clients import get_beaker
+from cuvette.utils.index import ExperimentIndex, created_at, jobs_finalized
+from cuvette.utils.records import ExperimentWithJobs
+from cuvette.utils.resolver import resolve_current_user, resolve_org, resolve_user, resolve_workspace
+from cuvette.utils.timings import TIMINGS, timed
+
+# Concurrent job.list calls in gather_experiments (gRPC multiplexes them over one channel)
+JOB_FETCH_CONCURRENCY = 32
+
+# Neighbouring time windows overlap by this much (seconds), so experiments on a boundary aren't missed
+SHARD_OVERLAP = 1e-3
+
+# Pages a sharded listing's time window aims for, which is also how far each one buffers ahead
+SHARD_WINDOW_PAGES = 2
 
 
 def run_command(cmd, shell=True):
@@ -33,8 +47,9 @@ def run_command(cmd, shell=True):
 
 
 def get_default_user():
-    beaker: Beaker = Beaker.from_env()
-    user = beaker.user_name
+    beaker = get_beaker()
+    with timed("grpc resolve current user"):
+        user = resolve_current_user(beaker)
     return user
 
 
@@ -43,74 +58,677 @@ def send_notification(title, message):
     os.system(f"""osascript -e 'display notification "{message}" with title "{title}"' """)
 
 
-def gather_experiments(author_list, workspace_name, limit=2000) -> List[ExperimentWithJobs]:
-    """Gather all experiments from a workspace, filtered by author."""
-    beaker = Beaker.from_env()
-    experiments = []
+def list_task_jobs(
+    beaker: Beaker, task: BeakerTask, org: Optional[BeakerOrganization] = None, **filters
+) -> List[BeakerJob]:
+    """The task's jobs, `filters` (e.g. finalized=False) are passed on to job.list"""
+    with timed("grpc job.list") as span:
+        jobs = list(beaker.job.list(org=org, task=task, **filters))
+        span.bytes = sum(job.ByteSize() for job in jobs)
+    return jobs
 
-    # bookkeeping
-    num_author_exps = {}
-    for author in author_list:
-        num_author_exps[author] = 0
 
-    print(f'Pulling experiments from "{workspace_name}" for author(s) {author_list}...')
-    
-    # Get workspace object
-    workspace = beaker.workspace.get(workspace_name)
-    
-    # Get user objects for filtering
-    user_objects = {}
-    for author in author_list:
-        user_objects[author] = beaker.user.get(author)
-    
-    # Process each author separately since workload.list can only filter by one author at a time
-    # Track which author each workload belongs to
-    workload_to_author = {}
-    all_workloads = []
-    for author in author_list:
-        user = user_objects[author]
-        # List workloads (experiments) from the workspace for this author
-        author_workloads = list(
+def list_experiment_jobs(
+    beaker: Beaker, task_ids: Iterable[str], org: Optional[BeakerOrganization] = None, **filters
+) -> List[BeakerJob]:
+    # job.list only reads the task's ID, so lazy records don't need to hold on to the experiment
+    return [job for task_id in task_ids for job in list_task_jobs(beaker, BeakerTask(id=task_id), org, **filters)]
+
+
+def prefetch_jobs(
+    experiments: Iterable[ExperimentWithJobs], concurrency: int = JOB_FETCH_CONCURRENCY
+) -> List[ExperimentWithJobs]:
+    """Load the jobs of many lazy experiments concurrently, instead of one at a time on first access"""
+    experiments = list(experiments)
+    pending = [experiment for experiment in experiments if not experiment.jobs_loaded]
+    if pending:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(lambda experiment: experiment.jobs, pending))
+    return experiments
+
+
+def iter_with_jobs(
+    beaker: Optional[Beaker],
+    items: Iterable[Tuple[Any, BeakerWorkload, Optional[List[BeakerJob]]]],
+    org: Optional[BeakerOrganization] = None,
+    concurrency: int = JOB_FETCH_CONCURRENCY,
+    window: Optional[int] = None,
+) -> Iterator[Tuple[Any, BeakerWorkload, List[BeakerJob]]]:
+    """
+    Fill in the jobs of (key, workload, jobs) items whose jobs are None, in input order. Jobs are
+    fetched concurrently for at most `window` experiments ahead of the consumer, and `items` is
+    only advanced as that window drains, so a slow consumer also slows down the listing.
+    """
+    window = window or 4 * concurrency
+    if beaker is not None:
+        beaker.service  # create the shared channel before the workers race to do it
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    # Jobs are associated with tasks, not directly with experiments, so fetch the jobs of every task
+    def submit(item):
+        key, workload, jobs = item
+        if jobs is None:
+            jobs = [executor.submit(list_task_jobs, beaker, task, org) for task in workload.experiment.tasks]
+            return key, workload, jobs, True
+        return key, workload, jobs, False
+
+    def result(pending):
+        key, workload, jobs, is_futures = pending
+        if is_futures:
+            jobs = [job for future in jobs for job in future.result()]
+        return key, workload, jobs
+
+    in_flight: Deque[Tuple[Any, BeakerWorkload, list, bool]] = deque()
+    try:
+        for item in items:
+            in_flight.append(submit(item))
+            if len(in_flight) >= window:
+                yield result(in_flight.popleft())
+        while in_flight:
+            yield result(in_flight.popleft())
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def fetch_jobs(
+    beaker: Beaker,
+    workloads: List[BeakerWorkload],
+    org: Optional[BeakerOrganization] = None,
+    concurrency: int = JOB_FETCH_CONCURRENCY,
+) -> List[List[BeakerJob]]:
+    """The jobs of each experiment, in input order"""
+    items = ((None, workload, None) for workload in workloads)
+    return [jobs for _, _, jobs in iter_with_jobs(beaker, items, org, concurrency, window=len(workloads) + 1)]
+
+
+def iter_experiment_workloads(
+    beaker: Beaker,
+    workspace: BeakerWorkspace,
+    user: BeakerUser,
+    org: Optional[BeakerOrganization] = None,
+    **kwargs,
+) -> Iterator[BeakerWorkload]:
+    """
+    workload.list() for experiments. Pages are only fetched as the caller consumes them. If Beaker
+    doesn't know the workspace or author ID (stale in the name cache), both are resolved again once.
+    """
+    def list_workloads(workspace: BeakerWorkspace, user: BeakerUser) -> Iterator[BeakerWorkload]:
+        return iter(
             beaker.workload.list(
+                org=org,
                 workspace=workspace,
                 author=user,
                 workload_type=BeakerWorkloadType.experiment,
-                limit=limit,
+                **kwargs,
+            )
+        )
+
+    workloads = list_workloads(workspace, user)
+    elapsed, nbytes, first_page = 0.0, 0, True
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                workload = next(workloads, None)
+            except BeakerNotFoundError:
+                if not first_page:
+                    raise
+                first_page = False
+                workspace = resolve_workspace(beaker, workspace.name, stale=workspace.id)
+                user = resolve_user(beaker, user.name, stale=user.id)
+                workloads = list_workloads(workspace, user)
+                continue
+            finally:
+                elapsed += time.perf_counter() - start
+            first_page = False
+            if workload is None:
+                return
+            nbytes += workload.ByteSize()
+            if beaker.workload.is_experiment(workload):
+                yield workload
+    finally:
+        TIMINGS.record("grpc workload.list", elapsed, nbytes)
+
+
+def list_experiment_workloads(
+    beaker: Beaker,
+    workspace: BeakerWorkspace,
+    user: BeakerUser,
+    org: Optional[BeakerOrganization] = None,
+    **kwargs,
+) -> List[BeakerWorkload]:
+    return list(iter_experiment_workloads(beaker, workspace, user, org, **kwargs))
+
+
+class BackgroundIterator:
+    """
+    Drains an iterator on a background thread into a bounded queue, so several listings make
+    progress at once while the caller reads them one after another. Stops early on close().
+    """
+    def __init__(self, make_iterator: Callable[[], Iterator], buffer: int = 256):
+        self._queue: "queue.Queue[Tuple[str, Any]]" = queue.Queue(maxsize=buffer)
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(make_iterator,), daemon=True)
+        self._thread.start()
+
+    def _put(self, kind: str, value: Any) -> bool:
+        while not self._closed.is_set():
+            try:
+                self._queue.put((kind, value), timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self, make_iterator: Callable[[], Iterator]):
+        iterator: Optional[Iterator] = None
+        try:
+            iterator = make_iterator()
+            for item in iterator:
+                if not self._put("item", item):
+                    return
+            self._put("done", None)
+        except BaseException as e:
+            self._put("error", e)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    def __iter__(self) -> Iterator:
+        while True:
+            kind, value = self._queue.get()
+            if kind == "done":
+                return
+            if kind == "error":
+                raise value
+            yield value
+
+    def close(self):
+        self._closed.set()
+
+
+def iter_sharded_workloads(
+    beaker: Beaker,
+    workspace: BeakerWorkspace,
+    user: BeakerUser,
+    org: Optional[BeakerOrganization] = None,
+    shards: int = 1,
+    limit: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    **kwargs,
+) -> Iterator[BeakerWorkload]:
+    """
+    iter_experiment_workloads(), with the listing cut into small creation-time windows of about
+    SHARD_WINDOW_PAGES pages, `shards` of which are paged through in parallel. Pagination is
+    serial, so this turns page count x round trip into roughly that over `shards`. Windows are read
+    newest first and deduplicated by ID, so the order is the same as one listing. Each window
+    buffers at most its own size ahead of the caller, so a slow caller holds up the listing
+    instead of piling it up in memory.
+    """
+    if shards <= 1:
+        yield from iter_experiment_workloads(
+            beaker, workspace, user, org, limit=limit, created_after=created_after, created_before=created_before, **kwargs
+        )
+        return
+
+    def listing(after: Optional[datetime], before: Optional[datetime], window_limit: Optional[int] = limit):
+        return iter_experiment_workloads(
+            beaker, workspace, user, org, limit=window_limit, created_after=after, created_before=before, **kwargs
+        )
+
+    # The newest page is the first window, and its time span sizes the next ones
+    window_size = SHARD_WINDOW_PAGES * beaker.workload.MAX_PAGE_SIZE
+    first = list(listing(created_after, created_before, beaker.workload.MAX_PAGE_SIZE))
+    seen = set()
+    for workload in first:
+        seen.add(workload.experiment.id)
+        yield workload
+        if limit is not None and len(seen) >= limit:
+            return
+    if len(first) < beaker.workload.MAX_PAGE_SIZE:
+        return  # that was everything
+    oldest = created_at(next(iter_experiment_workloads(
+        beaker, workspace, user, org, limit=1, sort_order=BeakerSortOrder.ascending,
+        created_after=created_after, created_before=created_before, **kwargs,
+    ), first[-1]))  # the oldest may have aged out of the filter since the first page
+    edge = created_at(first[-1])  # windows are cut from here back to `oldest`
+    counted, spanned = len(first), max(created_at(first[0]) - edge, SHARD_OVERLAP)
+
+    def cut() -> Optional[Tuple[float, float, functools.partial]]:
+        """The next window back in time as (start, end, listing), sized for `window_size` at the density seen so far"""
+        nonlocal edge
+        if edge is None:
+            return None
+        span = max(window_size * spanned / max(counted, 1), SHARD_OVERLAP)
+        before = datetime.fromtimestamp(edge + SHARD_OVERLAP, timezone.utc)
+        if edge - span <= oldest:
+            # The last window keeps the caller's bound, so nothing older than `oldest` slips through
+            window = (oldest, edge, functools.partial(listing, created_after, before))
+            edge = None
+        else:
+            after = datetime.fromtimestamp(edge - span - SHARD_OVERLAP, timezone.utc)
+            window = (edge - span, edge, functools.partial(listing, after, before))
+            edge -= span
+        return window
+
+    # Windows being listed, in the order they're read. A new one starts as the oldest is used up.
+    pending: Deque[Tuple[float, float, BackgroundIterator]] = deque()
+    try:
+        while True:
+            while len(pending) < shards:
+                window = cut()
+                if window is None:
+                    break
+                start, end, make_listing = window
+                pending.append((start, end, BackgroundIterator(make_listing, buffer=window_size)))
+            if not pending:
+                return
+            start, end, window_listing = pending.popleft()
+            num_listed = 0
+            for workload in window_listing:
+                num_listed += 1
+                if workload.experiment.id in seen:
+                    continue
+                seen.add(workload.experiment.id)
+                yield workload
+                if limit is not None and len(seen) >= limit:
+                    return
+            counted += num_listed
+            spanned += end - start
+    finally:
+        for _, _, window_listing in pending:
+            window_listing.close()
+
+
+def add_shard_args(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--shards", type=int, default=1,
+        help="List this many time windows of each author's experiments in parallel (for very large workspaces).",
+    )
+
+
+def sync_index(
+    beaker: Beaker,
+    index: ExperimentIndex,
+    workspace_name: str,
+    author: str,
+    limit: int,
+    org: Optional[BeakerOrganization] = None,
+    concurrency: int = JOB_FETCH_CONCURRENCY,
+    shards: int = 1,
+) -> int:
+    """
+    Bring one author's experiments in the index up to date: list only experiments created since
+    the last sync (and older ones if `limit` reaches past what is indexed), and re-fetch jobs only
+    for experiments that aren't finalized. Returns the number of experiments (re-)fetched.
+    """
+    with timed("grpc resolve workspace"):
+        workspace = resolve_workspace(beaker, workspace_name)
+    with timed("grpc resolve user"):
+        user = resolve_user(beaker, author)
+
+    state = index.state(workspace_name, author)
+    if state is None or state.newest is None:
+        listed = list(iter_sharded_workloads(beaker, workspace, user, org, shards, limit=limit))
+        complete = len(listed) < limit
+    else:
+        listed = list_experiment_workloads(
+            beaker, workspace, user, org, created_after=datetime.fromtimestamp(state.newest, timezone.utc)
+        )
+        complete = state.complete
+        missing = limit - state.count - len(listed)
+        if not complete and missing > 0:
+            older = list(
+                iter_sharded_workloads(
+                    beaker, workspace, user, org, shards,
+                    created_before=datetime.fromtimestamp(state.oldest, timezone.utc), limit=missing,
+                )
             )
+            listed += older
+            complete = len(older) < missing
+        # Experiments with jobs in flight, including finalized ones restarted since the last sync
+        listed += list_experiment_workloads(beaker, workspace, user, org, finalized=False)
+
+    refresh = {workload.experiment.id: workload for workload in listed}
+    for workload in index.unfinalized(workspace_name, author):
+        refresh.setdefault(workload.experiment.id, workload)
+
+    workloads = list(refresh.values())
+    jobs = fetch_jobs(beaker, workloads, org, concurrency)
+    index.upsert(workspace_name, author, zip(workloads, jobs))
+    index.save_state(workspace_name, author, complete)
+    return len(workloads)
+
+
+def iter_workspace_experiments(
+    author_list,
+    workspace_name,
+    limit=2000,
+    beaker: Optional[Beaker] = None,
+    concurrency: int = JOB_FETCH_CONCURRENCY,
+    use_index: bool = True,
+    offline: bool = False,
+    window: Optional[int] = None,
+    statuses: Optional[Iterable[BeakerWorkloadStatus]] = None,
+    finalized: Optional[bool] = None,
+    lazy_jobs: bool = False,
+    shards: int = 1,
+    log: Callable[[str], None] = print,
+) -> Iterator[ExperimentWithJobs]:
+    """
+    iter_experiments() for one workspace: yields each experiment, in order, as soon as its jobs
+    are known. Listing and job fetches run at most `window` experiments ahead of the consumer.
+    With `lazy_jobs`, experiments are yielded as they are listed and jobs that aren't already
+    indexed are only fetched when `.jobs` is read (see prefetch_jobs()). `shards` > 1 lists each
+    author as that many time windows in parallel (see iter_sharded_workloads()).
+    """
+    # Filters are sent with workload.list, so experiments that can't match are never listed and
+    # never have their jobs fetched. The index then only saves job fetches for finished ones.
+    # `limit` still means each author's newest `limit` experiments, filters only pick among them.
+    filtered = statuses is not None or finalized is not None
+    statuses = None if statuses is None else list(statuses)
+    if beaker is None and not offline:
+        beaker = get_beaker()
+
+    # bookkeeping
+    num_author_exps = {}
+    for author in author_list:
+        num_author_exps[author] = 0
+
+    log(f'Pulling experiments from "{workspace_name}" for author(s) {author_list}...')
+
+    # Resolve the org once, job.list would otherwise look it up again on every call
+    org = workspace = None
+    if not offline:
+        assert beaker is not None
+        beaker.service  # create the shared channel before the listing and job threads race to do it
+        with timed("grpc resolve org"):
+            org = resolve_org(beaker)
+        # Get workspace object (resolved IDs are cached across runs)
+        with timed("grpc resolve workspace"):
+            workspace = resolve_workspace(beaker, workspace_name)
+
+    window = window or 4 * concurrency
+    index = ExperimentIndex() if use_index or offline else None
+    # Authors without an index yet are listed from Beaker and indexed as their experiments stream by
+    unindexed = {}  # author -> whether the listing reached the author's oldest experiment
+
+    def limit_window(author, user) -> Optional[float]:
+        """
+        Creation time of the oldest of the author's newest `limit` experiments, found with an
+        unfiltered listing (pages only, no job fetches). An indexed author only has what was
+        created since the last sync listed, and the rest is counted in the index.
+        """
+        state = after = None
+        if index is not None:
+            with ExperimentIndex(index.path) as author_index:
+                state = author_index.state(workspace_name, author)
+            if state is not None and state.newest is not None:
+                after = datetime.fromtimestamp(state.newest, timezone.utc)
+        newer = [
+            created_at(w)
+            for w in iter_sharded_workloads(beaker, workspace, user, org, shards, limit=limit, created_after=after)
+        ]
+        if state is None or after is None or len(newer) >= limit:
+            return min(newer, default=None)
+        assert index is not None
+        with ExperimentIndex(index.path) as author_index:
+            start = author_index.created_nth(workspace_name, author, limit - len(newer))
+        if start is not None:
+            return start
+        if state.complete:
+            return state.oldest  # the author has fewer than `limit` experiments
+        # The index doesn't reach back far enough, count the whole window on Beaker
+        return min(
+            (created_at(w) for w in iter_sharded_workloads(beaker, workspace, user, org, shards, limit=limit)),
+            default=None,
         )
-        for workload in author_workloads:
-            workload_id = workload.experiment.id if beaker.workload.is_experiment(workload) else workload.environment.id
-            if workload_id not in workload_to_author:
-                workload_to_author[workload_id] = author
-                all_workloads.append(workload)
-    
-    for workload in all_workloads:
-        # Check if this workload is an experiment
-        if not beaker.workload.is_experiment(workload):
-            continue
-        
-        workload_id = workload.experiment.id
-        author_name = workload_to_author.get(workload_id, author_list[0] if author_list else "unknown")
-        
-        # Get the experiment object from the workload
-        experiment = workload.experiment
-        
-        # Fetch jobs for this experiment by getting jobs for each task
-        # Jobs are associated with tasks, not directly with experiments
-        jobs = []
-        for task in experiment.tasks:
-            task_jobs = list(beaker.job.list(task=task))
-            jobs.extend(task_jobs)
-        
-        # Wrap the experiment with jobs since we can't modify protobuf fields directly
-        experiment_with_jobs = ExperimentWithJobs(experiment, jobs)
-        experiments.append(experiment_with_jobs)
-        num_author_exps[author_name] += 1
-        
-        if len(experiments) >= limit:
-            break
-
-    print(f"Total experiments for authors {author_list}: {len(experiments)}")
+
+    def list_author(author):
+        with timed("grpc resolve user"):
+            user = resolve_user(beaker, author)
+        created_after = None
+        if filtered:
+            # Filters only pick among the newest `limit`, or they would reach back past what limit covers
+            with timed("limit window"):
+                start = limit_window(author, user)
+            if start is None:
+                return
+            created_after = datetime.fromtimestamp(start - SHARD_OVERLAP, timezone.utc)
+        num_listed = 0
+        for workload in iter_sharded_workloads(
+            beaker, workspace, user, org, shards, limit=limit, created_after=created_after,
+            statuses=statuses, finalized=finalized,
+        ):
+            num_listed += 1
+            yield workload
+        if author in unindexed:
+            unindexed[author] = num_listed < limit
+
+    listings: Dict[str, BackgroundIterator] = {}
+
+    def author_experiments(author):
+        """(author, workload, jobs) newest first, jobs are None until fetched"""
+        if author in listings:
+            for workload in listings[author]:
+                jobs = None
+                if filtered and index is not None:
+                    jobs = index.finalized_jobs(workload.experiment.id)
+                yield author, workload, jobs
+        else:
+            # Offline, filters are applied to the index as of the last sync
+            assert index is not None  # authors that weren't listed are read from the index
+            for workload, jobs in index.query(workspace_name, author, limit):
+                if statuses is not None and workload.status not in statuses:
+                    continue
+                if finalized is not None and jobs_finalized(jobs) != finalized:
+                    continue
+                yield author, workload, jobs
+
+    def selected():
+        # workload.list can only filter by one author at a time, so every author is listed
+        # concurrently but consumed in order. The first author listing a workload gets it.
+        seen = set()
+        for author in author_list:
+            for _, workload, jobs in author_experiments(author):
+                if workload.experiment.id in seen:
+                    continue
+                seen.add(workload.experiment.id)
+                yield author, workload, jobs
+                if len(seen) >= limit:
+                    return
+
+    def sync_author(author):
+        # One connection per thread, SQLite serializes the writes
+        assert index is not None
+        with ExperimentIndex(index.path) as author_index:
+            return sync_index(
+                beaker, author_index, workspace_name, author, limit, org, max(1, concurrency // len(synced)), shards
+            )
+
+    try:
+        synced = []
+        if index is not None and (offline or not filtered):
+            for author in author_list:
+                if offline:
+                    if index.state(workspace_name, author) is None:
+                        log(f"No local index for {author} in {workspace_name}, run once without --offline first")
+                elif index.state(workspace_name, author) is None:
+                    # Experiments can only be indexed with their jobs, so lazy listings don't start an index
+                    if not lazy_jobs:
+                        log(f"No local index for {author} yet, indexing experiments as they are listed")
+                        unindexed[author] = False
+                else:
+                    synced.append(author)
+
+        if synced:
+            with timed("sync index"), ThreadPoolExecutor(max_workers=len(synced)) as executor:
+                for author, num_synced in zip(synced, executor.map(sync_author, synced)):
+                    log(f"Synced {num_synced} new or unfinished experiments for {author} into the local index")
+
+        if not offline:
+            for author in author_list:
+                if author not in synced:
+                    listings[author] = BackgroundIterator(functools.partial(list_author, author), buffer=window)
+
+        num_experiments = 0
+        experiments = selected() if lazy_jobs else iter_with_jobs(beaker, selected(), org, concurrency, window)
+        for author_name, workload, jobs in experiments:
+            if index is not None and author_name in unindexed:
+                index.upsert(workspace_name, author_name, [(workload, jobs)])
+            elif filtered and index is not None and not offline and jobs is not None:
+                index.refresh([(workload, jobs)])
+            num_experiments += 1
+            num_author_exps[author_name] += 1
+            # Keep only the fields cuvette reads, so the protobufs can be dropped as we go
+            load_jobs = None
+            if jobs is None:
+                task_ids = [task.id for task in workload.experiment.tasks]
+                load_jobs = functools.partial(list_experiment_jobs, beaker, task_ids, org)
+            yield ExperimentWithJobs.from_pb2(workload, jobs, load_jobs, workspace=workspace_name)
+
+        if index is not None:
+            for author, complete in unindexed.items():
+                index.save_state(workspace_name, author, complete)
+    finally:
+        for listing in listings.values():
+            listing.close()
+        if index is not None:
+            index.close()
+
+    log(f"Total experiments for authors {author_list}: {num_experiments}")
     for author, count in num_author_exps.items():
-        print(f"Author {author} had {count} experiments")
-    return experiments
+        log(f"Author {author} had {count} experiments")
+
+
+def iter_experiments(
+    author_list,
+    workspace_name: Union[str, List[str]],
+    limit=2000,
+    beaker: Optional[Beaker] = None,
+    concurrency: int = JOB_FETCH_CONCURRENCY,
+    use_index: bool = True,
+    offline: bool = False,
+    window: Optional[int] = None,
+    statuses: Optional[Iterable[BeakerWorkloadStatus]] = None,
+    finalized: Optional[bool] = None,
+    lazy_jobs: bool = False,
+    shards: int = 1,
+) -> Iterator[ExperimentWithJobs]:
+    """
+    gather_experiments() as a generator, see iter_workspace_experiments(). Several workspaces are
+    crawled concurrently (`limit` applies to each) and yielded one workspace after another, with
+    one live progress display in place of each crawl's log lines.
+    """
+    workspaces = [workspace_name] if isinstance(workspace_name, str) else list(workspace_name)
+    kwargs = dict(
+        limit=limit,
+        concurrency=concurrency,
+        use_index=use_index,
+        offline=offline,
+        window=window,
+        statuses=statuses,
+        finalized=finalized,
+        lazy_jobs=lazy_jobs,
+        shards=shards,
+    )
+    if len(workspaces) == 1:
+        yield from iter_workspace_experiments(author_list, workspaces[0], beaker=beaker, **kwargs)
+        return
+
+    if beaker is None and not offline:
+        beaker = get_beaker()
+    if beaker is not None:
+        beaker.service  # create the shared channel before the crawls race to do it
+
+    progress = WorkspaceProgress(workspaces)
+    crawls = [
+        BackgroundIterator(
+            functools.partial(
+                iter_workspace_experiments, author_list, workspace, beaker=beaker, log=progress.logger(workspace), **kwargs
+            ),
+            buffer=window or 4 * concurrency,
+        )
+        for workspace in workspaces
+    ]
+    try:
+        with progress:
+            for crawl in crawls:
+                for experiment in crawl:
+                    progress.advance(experiment.workspace)
+                    yield experiment
+    finally:
+        for crawl in crawls:
+            crawl.close()
+    progress.print_summary(author_list)
+
+
+class WorkspaceProgress:
+    """One live display for several concurrent workspace crawls: a row per workspace with its count and latest log line"""
+    def __init__(self, workspaces: List[str]):
+        self.progress = Progress(
+            SpinnerColumn(),
+            TextColumn("[cyan]{task.description}"),
+            TextColumn("{task.completed} experiments"),
+            TextColumn("[dim]{task.fields[status]}"),
+        )
+        self.tasks = {workspace: self.progress.add_task(workspace, total=None, status="waiting") for workspace in workspaces}
+
+    def logger(self, workspace: str) -> Callable[[str], None]:
+        return lambda message: self.progress.update(self.tasks[workspace], status=message)
+
+    def advance(self, workspace: str):
+        self.progress.advance(self.tasks[workspace])
+
+    def print_summary(self, author_list):
+        total = sum(int(task.completed) for task in self.progress.tasks)
+        print(f"Total experiments for authors {author_list} across {len(self.tasks)} workspaces: {total}")
+        for task in self.progress.tasks:
+            print(f"Workspace {task.description} had {int(task.completed)} experiments")
+
+    def __enter__(self) -> "WorkspaceProgress":
+        self.progress.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.progress.stop()
+
+
+def gather_experiments(
+    author_list,
+    workspace_name: Union[str, List[str]],
+    limit=2000,
+    beaker: Optional[Beaker] = None,
+    concurrency: int = JOB_FETCH_CONCURRENCY,
+    use_index: bool = True,
+    offline: bool = False,
+    statuses: Optional[Iterable[BeakerWorkloadStatus]] = None,
+    finalized: Optional[bool] = None,
+    lazy_jobs: bool = False,
+    shards: int = 1,
+) -> List[ExperimentWithJobs]:
+    """
+    Gather all experiments from a workspace, filtered by author. By default this syncs the
+    local experiment index and serves experiments from it, `use_index=False` crawls the whole
+    workspace and `offline=True` only reads the index. `statuses` and `finalized` filter
+    experiments on the server, e.g. `statuses=[BeakerWorkloadStatus.failed]`. `lazy_jobs`
+    skips job fetches until `.jobs` is read. A list of workspaces is crawled concurrently, and
+    each experiment's `.workspace` says where it came from.
+    """
+    return list(
+        iter_experiments(
+            author_list,
+            workspace_name,
+            limit=limit,
+            beaker=beaker,
+            concurrency=concurrency,
+            use_index=use_index,
+            offline=offline,
+            statuses=statuses,
+            finalized=finalized,
+            lazy_jobs=lazy_jobs,
+            shards=shards,
+        )
+    )
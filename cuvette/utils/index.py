@@ -0,0 +1,201 @@
+import argparse
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from beaker import BeakerJob, BeakerWorkload
+
+from cuvette.utils.cache import CACHE_DIR
+
+INDEX_PATH = CACHE_DIR / "index.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS experiments (
+    id TEXT PRIMARY KEY,
+    workspace TEXT NOT NULL,
+    author TEXT NOT NULL,
+    created REAL NOT NULL,
+    finalized INTEGER NOT NULL,
+    workload BLOB NOT NULL,
+    synced REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS experiments_by_author ON experiments (workspace, author, created DESC);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    experiment_id TEXT NOT NULL,
+    job BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_experiment ON jobs (experiment_id);
+
+CREATE TABLE IF NOT EXISTS syncs (
+    workspace TEXT NOT NULL,
+    author TEXT NOT NULL,
+    complete INTEGER NOT NULL,
+    synced REAL NOT NULL,
+    PRIMARY KEY (workspace, author)
+);
+"""
+
+
+@dataclass
+class SyncState:
+    synced: float
+    complete: bool  # the index holds the author's whole history, not just the newest `limit`
+    newest: Optional[float]
+    oldest: Optional[float]
+    count: int
+
+
+def created_at(workload: BeakerWorkload) -> float:
+    created = workload.experiment.created
+    return created.seconds + created.nanos / 1e9
+
+
+def jobs_finalized(jobs: List[BeakerJob]) -> bool:
+    return bool(jobs) and all(job.status.HasField("finalized") for job in jobs)
+
+
+class ExperimentIndex:
+    """
+    A local SQLite index of experiments and their jobs, keyed by workspace and author. Rows are
+    the serialized protobufs, so they come back exactly as the Beaker SDK returned them. Keeping
+    it current is up to the caller, see sync_index() in utils/general.py.
+    """
+    def __init__(self, path: Path = INDEX_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Rows are written as experiments stream by, possibly from a generator resumed on another thread
+        self.db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def state(self, workspace: str, author: str) -> Optional[SyncState]:
+        row = self.db.execute(
+            "SELECT synced, complete FROM syncs WHERE workspace = ? AND author = ?", (workspace, author)
+        ).fetchone()
+        if row is None:
+            return None
+        newest, oldest, count = self.db.execute(
+            "SELECT MAX(created), MIN(created), COUNT(*) FROM experiments WHERE workspace = ? AND author = ?",
+            (workspace, author),
+        ).fetchone()
+        return SyncState(synced=row[0], complete=bool(row[1]), newest=newest, oldest=oldest, count=count)
+
+    def save_state(self, workspace: str, author: str, complete: bool):
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO syncs (workspace, author, complete, synced) VALUES (?, ?, ?, ?)",
+                (workspace, author, int(complete), time.time()),
+            )
+
+    def upsert(self, workspace: str, author: str, experiments: Iterable[Tuple[BeakerWorkload, List[BeakerJob]]]):
+        """Store experiments with their (complete, freshly listed) jobs in one transaction"""
+        now = time.time()
+        with self.db:
+            for workload, jobs in experiments:
+                experiment_id = workload.experiment.id
+                self.db.execute(
+                    "INSERT OR REPLACE INTO experiments VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        experiment_id,
+                        workspace,
+                        author,
+                        created_at(workload),
+                        int(jobs_finalized(jobs)),
+                        workload.SerializeToString(),
+                        now,
+                    ),
+                )
+                self.db.execute("DELETE FROM jobs WHERE experiment_id = ?", (experiment_id,))
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?)",
+                    [(job.id, experiment_id, job.SerializeToString()) for job in jobs],
+                )
+
+    def unfinalized(self, workspace: str, author: str) -> List[BeakerWorkload]:
+        """Experiments whose jobs may still change, so they get re-fetched on every sync"""
+        rows = self.db.execute(
+            "SELECT workload FROM experiments WHERE workspace = ? AND author = ? AND NOT finalized",
+            (workspace, author),
+        )
+        return [BeakerWorkload.FromString(row[0]) for row in rows]
+
+    def refresh(self, experiments: Iterable[Tuple[BeakerWorkload, List[BeakerJob]]]):
+        """Update experiments that are already indexed, leaving the sync cursors untouched"""
+        now = time.time()
+        with self.db:
+            for workload, jobs in experiments:
+                experiment_id = workload.experiment.id
+                updated = self.db.execute(
+                    "UPDATE experiments SET finalized = ?, workload = ?, synced = ? WHERE id = ?",
+                    (int(jobs_finalized(jobs)), workload.SerializeToString(), now, experiment_id),
+                ).rowcount
+                if updated:
+                    self.db.execute("DELETE FROM jobs WHERE experiment_id = ?", (experiment_id,))
+                    self.db.executemany(
+                        "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?)",
+                        [(job.id, experiment_id, job.SerializeToString()) for job in jobs],
+                    )
+
+    def finalized_jobs(self, experiment_id: str) -> Optional[List[BeakerJob]]:
+        """The indexed jobs of an experiment, if they can no longer change"""
+        row = self.db.execute("SELECT finalized FROM experiments WHERE id = ?", (experiment_id,)).fetchone()
+        if row is None or not row[0]:
+            return None
+        rows = self.db.execute("SELECT job FROM jobs WHERE experiment_id = ?", (experiment_id,))
+        return [BeakerJob.FromString(row[0]) for row in rows]
+
+    def mark_stale(self, experiment_ids: Iterable[str]):
+        """Force a re-fetch on the next sync, e.g. after restarting or stopping experiments"""
+        with self.db:
+            self.db.executemany(
+                "UPDATE experiments SET finalized = 0 WHERE id = ?", [(id,) for id in experiment_ids]
+            )
+
+    def query(
+        self, workspace: str, author: str, limit: Optional[int] = None
+    ) -> List[Tuple[BeakerWorkload, List[BeakerJob]]]:
+        """The author's newest experiments with their jobs, newest first, like workload.list"""
+        rows = self.db.execute(
+            "SELECT id, workload FROM experiments WHERE workspace = ? AND author = ? ORDER BY created DESC LIMIT ?",
+            (workspace, author, -1 if limit is None else limit),
+        ).fetchall()
+        jobs: Dict[str, List[BeakerJob]] = {id: [] for id, _ in rows}
+        for start in range(0, len(rows), 500):
+            ids = [id for id, _ in rows[start : start + 500]]
+            for experiment_id, job in self.db.execute(
+                f"SELECT experiment_id, job FROM jobs WHERE experiment_id IN ({','.join('?' * len(ids))})", ids
+            ):
+                jobs[experiment_id].append(BeakerJob.FromString(job))
+        return [(BeakerWorkload.FromString(workload), jobs[id]) for id, workload in rows]
+
+    def created_nth(self, workspace: str, author: str, n: int) -> Optional[float]:
+        """Creation time of the author's n-th newest indexed experiment, None if fewer are indexed"""
+        row = self.db.execute(
+            "SELECT created FROM experiments WHERE workspace = ? AND author = ? ORDER BY created DESC LIMIT 1 OFFSET ?",
+            (workspace, author, n - 1),
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self) -> "ExperimentIndex":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def add_index_args(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--no-index", action="store_true", default=False,
+        help=(
+            "Don't use the local experiment index. bindex then crawls the whole workspace, commands that "
+            "filter by status fetch the jobs of finished experiments instead of reading them from the index."
+        ),
+    )
@@ -0,0 +1,131 @@
+import argparse
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from cuvette.utils.cache import CACHE_DIR
+
+JOURNAL_DIR = CACHE_DIR / "journals"
+
+
+class Journal:
+    """
+    An append-only log of a bulk command's planned and completed actions, keyed by experiment ID,
+    so an interrupted run can be resumed. Each line is a JSON event: "plan" (with whatever the
+    action needs to be replayed), "done", "failed", and "listed" once every action is planned.
+    One journal per command and arguments, a new run without `resume` starts it over.
+    """
+    def __init__(self, command: str, params: Dict[str, Any], resume: bool = False, root: Path = JOURNAL_DIR):
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        self.path = Path(root) / f"{command}-{digest}.jsonl"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.planned: Dict[str, Dict[str, Any]] = {}  # in planning order
+        self.done: Set[str] = set()
+        self.failed: Dict[str, str] = {}
+        self.listed = False
+        self.resumed = resume and self.path.exists()
+        if self.resumed:
+            self._replay()
+            self._drop_torn_tail()
+        self._file = open(self.path, "a" if self.resumed else "w")
+        self._lock = threading.Lock()
+        if not self.resumed:
+            self._write("start", None, params=params)
+
+    def _replay(self):
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut short when a run died
+                event, key = entry["event"], entry.get("id")
+                if event == "plan":
+                    self.planned[key] = entry.get("data", {})
+                elif event == "done":
+                    self.done.add(key)
+                    self.failed.pop(key, None)
+                elif event == "failed":
+                    self.failed[key] = entry.get("error", "")
+                elif event == "listed":
+                    self.listed = True
+
+    def _drop_torn_tail(self):
+        """Cut a last line left unterminated by a crash, so new events don't get glued onto it"""
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def _write(self, event: str, key: Optional[str], **fields):
+        line = json.dumps({"event": event, "id": key, "time": time.time(), **fields}, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def plan(self, key: str, **data):
+        self.planned[key] = data
+        self._write("plan", key, data=data)
+
+    def complete(self, key: str):
+        self.done.add(key)
+        self.failed.pop(key, None)
+        self._write("done", key)
+
+    def fail(self, key: str, error: BaseException):
+        self.failed[key] = str(error)
+        self._write("failed", key, error=str(error))
+
+    def finish_listing(self):
+        self.listed = True
+        self._write("listed", None)
+
+    def remaining(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Planned actions that haven't completed (including failed ones), in planning order"""
+        return [(key, data) for key, data in self.planned.items() if key not in self.done]
+
+    def pending(
+        self,
+        list_items: Callable[[], Iterable[Any]],
+        key: Callable[[Any], str] = lambda item: item.id,
+        data: Callable[[Any], Dict[str, Any]] = lambda item: {},
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        The (key, data) actions left to run. A resumed run that had finished listing replays the
+        journal without calling `list_items`, otherwise items are journaled as they stream out of
+        it, skipping the ones already done.
+        """
+        if self.resumed and self.listed:
+            remaining = self.remaining()
+            print(f"Resuming {self.path}: {len(remaining)} of {len(self.planned)} actions left, skipping the listing")
+            yield from remaining
+            return
+        if self.resumed:
+            print(f"Resuming {self.path}: {len(self.done)} actions already done, listing the rest")
+        for item in list_items():
+            item_key = key(item)
+            if item_key in self.done:
+                continue
+            item_data = data(item)
+            self.plan(item_key, **item_data)
+            yield item_key, item_data
+        self.finish_listing()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def add_journal_args(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--resume", action="store_true", default=False,
+        help="Pick up an interrupted run with the same arguments, skipping the listing if it finished and the actions already done.",
+    )
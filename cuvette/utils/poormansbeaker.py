@@ -1,21 +1,113 @@
+import hashlib
 import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 import requests
 import yaml
+from requests.adapters import HTTPAdapter
+
+from cuvette.utils.cache import ResponseCache
+from cuvette.utils.resolver import get_resolver
+from cuvette.utils.timings import TIMINGS, endpoint_name
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class RequestStats:
+    requests: int = 0
+    not_modified: int = 0  # conditional requests answered with 304
+    retries: int = 0
+    retry_wait: float = 0.0  # seconds spent sleeping between attempts
+    retries_exhausted: int = 0  # requests that failed because the retry budget ran out
+    hedges: int = 0  # duplicate requests sent because the first was slow
+    hedge_wins: int = 0  # hedges that answered before the original request
+    hedge_saved: float = 0.0  # seconds saved by hedges that won
+
+
+@dataclass
+class CachedResponse:
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body: Dict
 
 
 class PoorMansBeaker:
     """
     An HTTPS client for Beaker for when RPC is too slow
     """
-    def __init__(self, token: str, base_url: str = "https://beaker.org"):
+    def __init__(
+        self,
+        token: str,
+        base_url: str = "https://beaker.org",
+        pool_size: int = 16,
+        timeout: Union[float, Tuple[float, float]] = (5.0, 30.0),
+        keep_alive: bool = True,
+        max_validators: int = 512,
+        cache: Optional[ResponseCache] = None,
+        max_retries: int = 5,
+        retry_budget: int = 50,
+        retry_refill: float = 0.5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        hedge: bool = False,
+        hedge_percentile: float = 0.95,
+        hedge_max_ratio: float = 0.1,
+        hedge_min_samples: int = 5,
+    ):
         self.token = token
+        self.address = base_url  # scopes the IDs it resolves, like Beaker's config.agent_address
         self.base_url = f"{base_url}/api/v3"
-    
+        self.pool_size = pool_size
+        self.timeout = timeout  # (connect, read) in seconds
+        self.keep_alive = keep_alive
+        self._session: Optional[requests.Session] = None
+        self._session_lock = threading.Lock()
+        # Validators (ETag / Last-Modified) and bodies of recent responses, for conditional requests
+        self.max_validators = max_validators
+        self._validators: "OrderedDict[Tuple, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()  # guards validators, stats and the retry budget
+        self.stats = RequestStats()
+        TIMINGS.add_counters("https", self.stats_dict)
+        # Optional on-disk cache shared across processes (see cuvette.utils.cache)
+        self.cache = cache
+        self._token_digest = hashlib.sha256(token.encode()).hexdigest()[:16]
+        # Retries for transient failures: per request, and across the client from a token bucket that
+        # holds `retry_budget` retries and refills at `retry_refill` per second, so an outage can't
+        # multiply the load but a long-lived client (the widget) gets its retries back once it passes
+        self.max_retries = max_retries
+        self.retry_budget = retry_budget
+        self.retry_refill = retry_refill
+        self._retry_tokens = float(retry_budget)
+        self._retry_refilled = time.monotonic()
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Hedging: if a GET is slower than `hedge_percentile` of recent latencies, send a duplicate
+        # and take whichever answers first. Hedges are capped at `hedge_max_ratio` of all requests.
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_max_ratio = hedge_max_ratio
+        self.hedge_min_samples = hedge_min_samples
+        self._latencies: deque = deque(maxlen=200)
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+
+    def stats_dict(self) -> Dict[str, float]:
+        """Retry and hedge counters, shown by --timings"""
+        with self._lock:
+            return asdict(self.stats)
+
     @classmethod
-    def from_env(cls) -> "PoorMansBeaker":
+    def from_env(cls, **kwargs) -> "PoorMansBeaker":
         token = os.environ.get("BEAKER_TOKEN")
         if not token:
             config_path = Path.home() / ".beaker" / "config.yml"
@@ -24,16 +116,219 @@ class PoorMansBeaker:
                     token = yaml.safe_load(f)["user_token"]
         if not token:
             raise ValueError("No BEAKER_TOKEN found")
-        return cls(token)
-    
+        return cls(token, **kwargs)
+
+    @property
+    def session(self) -> requests.Session:
+        """A pooled keep-alive session, shared by every JobClient built from this client"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    # urllib3 pools are thread-safe, so one adapter can serve every worker thread
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers["Authorization"] = f"Bearer {self.token}"
+                    session.headers["Connection"] = "keep-alive" if self.keep_alive else "close"
+                    self._session = session
+        return self._session
+
+    @property
+    def num_connections(self) -> int:
+        """Number of TCP (+TLS) connections opened so far, i.e. handshakes paid"""
+        if self._session is None:
+            return 0
+        pool = self._session.get_adapter(self.base_url).poolmanager.connection_from_url(self.base_url)
+        return pool.num_connections
+
+    def close(self):
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False, cancel_futures=True)
+            self._hedge_executor = None
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def __enter__(self) -> "PoorMansBeaker":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _backoff(self, attempt: int, resp: Optional[requests.Response]) -> float:
+        """Seconds to wait before retrying: Retry-After if the server sent one, else full jitter"""
+        if resp is not None and resp.status_code in (429, 503) and "Retry-After" in resp.headers:
+            retry_after = resp.headers["Retry-After"]
+            try:
+                wait = float(retry_after)
+            except ValueError:
+                try:
+                    wait = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    wait = self.backoff_base
+            return min(max(wait, 0.0), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def _take_retry(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            elapsed, self._retry_refilled = now - self._retry_refilled, now
+            self._retry_tokens = min(float(self.retry_budget), self._retry_tokens + elapsed * self.retry_refill)
+            if self._retry_tokens < 1:
+                self.stats.retries_exhausted += 1
+                return False
+            self._retry_tokens -= 1
+            self.stats.retries += 1
+            return True
+
+    def _send(self, url: str, params: Optional[Dict[str, Any]], headers: Dict[str, str]) -> requests.Response:
+        """A GET with retries on connection errors, timeouts, 429 and 5xx (safe, as GETs are idempotent)"""
+        attempt = 0
+        while True:
+            resp: Optional[requests.Response] = None
+            try:
+                resp = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+                if resp.status_code not in RETRY_STATUSES:
+                    return resp
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries or not self._take_retry():
+                    raise
+            else:
+                if attempt >= self.max_retries or not self._take_retry():
+                    return resp  # let the caller raise_for_status()
+
+            wait = self._backoff(attempt, resp)
+            with self._lock:
+                self.stats.retry_wait += wait
+            time.sleep(wait)
+            attempt += 1
+
+    def _timed_send(self, url: str, params: Optional[Dict[str, Any]], headers: Dict[str, str]) -> Tuple[requests.Response, float]:
+        start = time.monotonic()
+        resp = self._send(url, params, headers)
+        end = time.monotonic()
+        with self._lock:
+            self._latencies.append(end - start)
+        return resp, end
+
+    def _hedge_delay(self) -> Optional[float]:
+        """How long to wait for an answer before hedging, or None if we shouldn't hedge now"""
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            if self.stats.hedges >= self.hedge_max_ratio * self.stats.requests + 1:
+                return None  # over the extra-load cap
+            latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(self.hedge_percentile * len(latencies)))]
+
+    def _hedged_send(self, url: str, params: Optional[Dict[str, Any]], headers: Dict[str, str]) -> requests.Response:
+        delay = self._hedge_delay() if self.hedge else None
+        if delay is None:
+            return self._timed_send(url, params, headers)[0]
+
+        with self._session_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=2 * self.pool_size, thread_name_prefix="pmb-hedge")
+            executor = self._hedge_executor
+
+        primary = executor.submit(self._timed_send, url, params, headers)
+        done, _ = wait([primary], timeout=delay)
+        if done or self._hedge_delay() is None:
+            return primary.result()[0]
+
+        with self._lock:
+            self.stats.hedges += 1
+        hedge = executor.submit(self._timed_send, url, params, headers)
+
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((f for f in done if f.exception() is None), None)
+            if winner is not None:
+                break
+        else:
+            return primary.result()[0]  # both failed, raise the original error
+
+        loser = hedge if winner is primary else primary
+        loser.cancel()  # requests can't abort an in-flight GET, so a running loser is just dropped
+
+        def release(f: Future):
+            if f.cancelled() or f.exception() is not None:
+                return
+            resp, loser_end = f.result()
+            resp.close()
+            if winner is hedge:
+                with self._lock:
+                    self.stats.hedge_saved += loser_end - win_end
+
+        resp, win_end = winner.result()
+        if winner is hedge:
+            with self._lock:
+                self.stats.hedge_wins += 1
+        loser.add_done_callback(release)
+        return resp
+
     def _get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict:
-        resp = requests.get(
-            f"{self.base_url}/{endpoint}",
-            headers={"Authorization": f"Bearer {self.token}"},
-            params=params,
-        )
+        """
+        GET an endpoint. If we have seen this URL and parameter set before, the request is made
+        conditional, and a 304 reply returns the previous body (shared, so treat it as read-only).
+        """
+        key = (endpoint, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+        name = endpoint_name("GET", endpoint)
+
+        disk_key, entry = None, None
+        if self.cache is not None and self.cache.enabled:
+            query = "&".join(f"{k}={v}" for k, v in key[1])
+            disk_key = f"GET {endpoint}?{query} @{self.base_url} #{self._token_digest}"
+            with TIMINGS.timed(f"{name} (disk cache)"):
+                entry = self.cache.lookup(disk_key)
+            if entry is not None and entry.fresh:
+                return entry.value["body"]
+
+        with self._lock:
+            cached = self._validators.get(key)
+        if cached is None and entry is not None:
+            # A stale disk entry still lets us ask the server whether anything changed
+            cached = CachedResponse(**entry.value)
+
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        with TIMINGS.timed(name) as span:
+            resp = self._hedged_send(f"{self.base_url}/{endpoint}", params, headers)
+            span.bytes = len(resp.content)
+            span.error = not resp.ok and resp.status_code != 304
+
+        if resp.status_code == 304 and cached is not None:
+            with self._lock:
+                self.stats.requests += 1
+                self.stats.not_modified += 1
+                if key in self._validators:
+                    self._validators.move_to_end(key)
+            if disk_key is not None and self.cache is not None:
+                self.cache.set(disk_key, asdict(cached))
+            return cached.body
+
         resp.raise_for_status()
-        return resp.json()
+        body = resp.json()
+
+        etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+        with self._lock:
+            self.stats.requests += 1
+            if etag or last_modified:
+                self._validators[key] = CachedResponse(etag, last_modified, body)
+                self._validators.move_to_end(key)
+                while len(self._validators) > self.max_validators:
+                    self._validators.popitem(last=False)
+        if disk_key is not None and self.cache is not None:
+            self.cache.set(disk_key, asdict(CachedResponse(etag, last_modified, body)))
+        return body
 
 
 class JobClient:
@@ -44,50 +339,86 @@ class JobClient:
         """Get detailed info for a single job."""
         return self.beaker._get(f"jobs/{job_id}")
 
-    def list(
+    def get_many(self, job_ids: List[str], concurrency: int = 16) -> List[Union[Dict, BaseException]]:
+        """
+        Get detailed info for many jobs in parallel, at most `concurrency` at a time. Results keep
+        the input order; a job that could not be fetched gets its exception in place of a dict.
+        """
+        unique_ids = list(dict.fromkeys(job_ids))
+        results: Dict[str, Union[Dict, BaseException]] = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(unique_ids)))) as executor:
+            futures = {job_id: executor.submit(self.get, job_id) for job_id in unique_ids}
+            for job_id, future in futures.items():
+                try:
+                    results[job_id] = future.result()
+                except Exception as e:
+                    results[job_id] = e
+        return [results[job_id] for job_id in job_ids]
+
+    def iter_jobs(
         self,
         author: Optional[str] = None,
         finalized: bool = False,
         limit: Optional[int] = None,
         kind: Optional[str] = None,  # "execution" or "session"
-    ) -> List[Dict]:
+        prefetch: bool = True,
+    ) -> Iterator[Dict]:
+        """
+        Yield jobs as each page arrives. With `prefetch`, the next page is requested in the
+        background while the caller works through the current one. Stopping early (hitting
+        `limit`, or closing the generator) stops paging right away.
+        """
         params: Dict[str, Any] = {"finalized": finalized}
 
         if kind:
             params["kind"] = kind
 
         if author:
-            # Resolve username to ID
-            user = self.beaker._get(f"users/{author}")
-            params["author"] = user["id"]
+            # Resolve username to ID (cached, shared with the gRPC path)
+            params["author"] = get_resolver().resolve(
+                self.beaker.address, "user", author, lambda: self.beaker._get(f"users/{author}")["id"]
+            )
 
-        jobs = []
-        total_fetched = 0
-        while True:
-            page = self.beaker._get("jobs", params)
-            page_data = page.get("data", [])
-            if not page_data:
-                # No jobs at all, just return []
-                return []
-            # Handle limit enforcement
-            if limit is not None:
-                needed = limit - total_fetched
-                jobs.extend(page_data[:needed])
-                total_fetched += len(page_data[:needed])
-                if total_fetched >= limit:
-                    break
-            else:
-                jobs.extend(page_data)
-            cursor = page.get("next") or page.get("nextCursor")
-            if not cursor:
-                break
-            params["cursor"] = cursor
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pmb-prefetch") if prefetch else None
+        count = 0
+        try:
+            page = self.beaker._get("jobs", dict(params))
+            while True:
+                page_data = page.get("data", [])
+                cursor = page.get("next") or page.get("nextCursor")
+
+                next_page: Optional[Future] = None
+                if cursor and executor is not None and (limit is None or count + len(page_data) < limit):
+                    next_page = executor.submit(self.beaker._get, "jobs", dict(params, cursor=cursor))
+
+                for job in page_data:
+                    if limit is not None and count >= limit:
+                        return
+                    count += 1
+                    yield job
+
+                if not cursor or (limit is not None and count >= limit):
+                    return
+                if next_page is not None:
+                    page = next_page.result()
+                else:
+                    page = self.beaker._get("jobs", dict(params, cursor=cursor))
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
 
-        return jobs[:limit] if limit is not None else jobs
+    def list(
+        self,
+        author: Optional[str] = None,
+        finalized: bool = False,
+        limit: Optional[int] = None,
+        kind: Optional[str] = None,  # "execution" or "session"
+    ) -> List[Dict]:
+        return list(self.iter_jobs(author=author, finalized=finalized, limit=limit, kind=kind))
 
 
 # Example use
 if __name__ == "__main__":
     beaker = PoorMansBeaker.from_env()
     workloads = JobClient(beaker=beaker).list(author="davidh", finalized=False)
-    print(f"Running experiments: {len(workloads)}")
\ No newline at end of file
+    print(f"Running experiments: {len(workloads)}")
@@ -0,0 +1,91 @@
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from beaker import BeakerJob, BeakerWorkload
+
+
+def _timestamp(message, name: str) -> Optional[float]:
+    if not message.HasField(name):
+        return None
+    value = getattr(message, name)
+    return value.seconds + value.nanos / 1e9
+
+
+@dataclass(slots=True)
+class JobRecord:
+    """The fields cuvette reads from a BeakerJob, copied out so the protobuf can be dropped"""
+    id: str
+    name: str
+    task_id: str
+    status: int  # BeakerWorkloadStatus
+    exit_code: Optional[int]
+    exited: Optional[float]
+    finalized: Optional[float]
+    canceled: Optional[float]
+    replicas: int
+    result_dataset_id: Optional[str]
+
+    @classmethod
+    def from_pb2(cls, job: BeakerJob) -> "JobRecord":
+        status = job.status
+        assignment = job.assignment_details
+        return cls(
+            id=job.id,
+            name=job.name,
+            task_id=job.task_id,
+            status=status.status,
+            exit_code=status.exit_code if status.HasField("exit_code") else None,
+            exited=_timestamp(status, "exited"),
+            finalized=_timestamp(status, "finalized"),
+            canceled=_timestamp(status, "canceled"),
+            replicas=job.system_details.replica_group_details.size or 1,
+            result_dataset_id=assignment.result_dataset_id if assignment.HasField("result_dataset_id") else None,
+        )
+
+
+@dataclass(slots=True)
+class ExperimentWithJobs:
+    """
+    An experiment and its jobs, reduced to the fields cuvette reads. Jobs can be given up front
+    or loaded by `load_jobs` the first time `.jobs` is read.
+    """
+    id: str
+    name: str
+    created: float
+    status: int  # BeakerWorkloadStatus
+    task_ids: Tuple[str, ...]
+    workspace: str = ""
+    _jobs: Optional[List[JobRecord]] = None
+    _load_jobs: Optional[Callable[[], List[BeakerJob]]] = field(default=None, repr=False)
+
+    @classmethod
+    def from_pb2(
+        cls,
+        workload: BeakerWorkload,
+        jobs: Optional[List[BeakerJob]] = None,
+        load_jobs: Optional[Callable[[], List[BeakerJob]]] = None,
+        workspace: str = "",
+    ) -> "ExperimentWithJobs":
+        experiment = workload.experiment
+        return cls(
+            id=experiment.id,
+            name=experiment.name or experiment.id,
+            created=_timestamp(experiment, "created") or 0.0,
+            status=workload.status,
+            task_ids=tuple(task.id for task in experiment.tasks),
+            workspace=workspace,
+            _jobs=None if jobs is None else [JobRecord.from_pb2(job) for job in jobs],
+            _load_jobs=load_jobs,
+        )
+
+    @property
+    def jobs_loaded(self) -> bool:
+        return self._jobs is not None
+
+    @property
+    def jobs(self) -> List[JobRecord]:
+        if self._jobs is None:
+            jobs = self._load_jobs() if self._load_jobs is not None else []
+            self._jobs = [JobRecord.from_pb2(job) for job in jobs]
+            self._load_jobs = None
+        return self._jobs
@@ -0,0 +1,112 @@
+import hashlib
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from beaker import Beaker, BeakerOrganization, BeakerUser, BeakerWorkspace
+
+from cuvette.utils.cache import CACHE_DIR, ResponseCache
+
+NAME_TTL = 7 * 24 * 60 * 60
+
+
+class Resolver:
+    """
+    Caches name -> ID lookups for users and workspaces, in memory and on disk. These mappings
+    almost never change, so both the HTTPS (PoorMansBeaker) and gRPC (Beaker) paths share
+    one resolver and skip the round trips on every command after the first. Entries are kept
+    per `server` (its address), as IDs from one Beaker mean nothing to another.
+    """
+    def __init__(self, cache: Optional[ResponseCache] = None):
+        self.cache = cache if cache is not None else ResponseCache(root=CACHE_DIR / "names", ttls={"": NAME_TTL})
+        self._memo: Dict[Tuple[str, str, str], str] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, server: str, kind: str, name: str) -> Optional[str]:
+        """Return the cached ID for `name`, or None on a miss"""
+        with self._lock:
+            if (server, kind, name) in self._memo:
+                return self._memo[(server, kind, name)]
+        resolved = self.cache.get(f"{server} {kind}:{name}")
+        if resolved is not None:
+            with self._lock:
+                self._memo[(server, kind, name)] = resolved
+        return resolved
+
+    def store(self, server: str, kind: str, name: str, resolved: str):
+        with self._lock:
+            self._memo[(server, kind, name)] = resolved
+        self.cache.set(f"{server} {kind}:{name}", resolved)
+
+    def resolve(
+        self, server: str, kind: str, name: str, fetch: Callable[[], str], stale: Optional[str] = None
+    ) -> str:
+        """
+        Return the ID for `name`, calling `fetch` (which must return the ID) only on a miss. A
+        cached ID equal to `stale`, i.e. one the server didn't know, is dropped and fetched again.
+        """
+        resolved = self.lookup(server, kind, name)
+        if resolved is not None and resolved == stale:
+            self.invalidate(server, kind, name)
+            resolved = None
+        if resolved is None:
+            resolved = fetch()
+            self.store(server, kind, name, resolved)
+        return resolved
+
+    def invalidate(self, server: str, kind: str, name: str):
+        with self._lock:
+            self._memo.pop((server, kind, name), None)
+        self.cache.set(f"{server} {kind}:{name}", None)
+
+
+_resolver: Optional[Resolver] = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver() -> Resolver:
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = Resolver()
+            _resolver.cache.enabled = not os.environ.get("CUVETTE_NO_CACHE")
+        return _resolver
+
+
+def resolve_user(beaker: Beaker, name: str, stale: Optional[str] = None) -> BeakerUser:
+    """
+    A user stub carrying just the ID, which the Beaker SDK accepts without resolving again. Pass
+    the ID of a stub Beaker answered NOT_FOUND for as `stale` to look it up again.
+    """
+    user_id = get_resolver().resolve(
+        beaker.config.agent_address, "user", name, lambda: beaker.user.get(name).id, stale=stale
+    )
+    return BeakerUser(id=user_id, name=name)
+
+
+def resolve_workspace(beaker: Beaker, name: str, stale: Optional[str] = None) -> BeakerWorkspace:
+    """A workspace stub carrying just the ID, like resolve_user()"""
+    workspace_id = get_resolver().resolve(
+        beaker.config.agent_address, "workspace", name, lambda: beaker.workspace.get(name).id, stale=stale
+    )
+    return BeakerWorkspace(id=workspace_id, name=name)
+
+
+def resolve_org(beaker: Beaker) -> Optional[BeakerOrganization]:
+    """
+    A stub for the default org. Listing calls resolve the org on every request unless
+    handed one, which doubles the round trips of e.g. a job.list per task.
+    """
+    name = beaker.config.default_org
+    if name is None:
+        return None
+    org_id = get_resolver().resolve(
+        beaker.config.agent_address, "org", name, lambda: beaker.organization.resolve_org_id(name)
+    )
+    return BeakerOrganization(id=org_id, name=name)
+
+
+def resolve_current_user(beaker: Beaker) -> str:
+    """The name of the user owning the configured token"""
+    token_digest = hashlib.sha256(beaker.config.user_token.encode()).hexdigest()[:16]
+    return get_resolver().resolve(beaker.config.agent_address, "token", token_digest, lambda: beaker.user_name)
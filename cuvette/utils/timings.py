@@ -0,0 +1,195 @@
+import contextlib
+import functools
+import json
+import math
+import sys
+import threading
+import time
+import weakref
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from rich.console import Console
+from rich.table import Table
+
+from cuvette.constants.beaker import BEAKER_ID
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+
+
+@dataclass
+class EndpointTimings:
+    count: int = 0
+    errors: int = 0
+    bytes: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    histogram: List[int] = field(default_factory=lambda: [0] * len(BUCKETS))
+
+    def percentile(self, q: float) -> float:
+        """Approximate percentile: the upper bound of the bucket holding it (capped at max)"""
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.histogram):
+            seen += n
+            if seen >= target and n:
+                return min(bound, self.max)
+        return self.max
+
+
+@dataclass
+class Span:
+    """Handed out by Timings.timed() so the caller can report payload size and failures"""
+    bytes: int = 0
+    error: bool = False
+
+
+class Timings:
+    """
+    Per-endpoint call counts, payload bytes and latency histograms for one process, plus the
+    counters of registered clients (e.g. retries and hedges), summed across clients.
+    """
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointTimings] = {}
+        self._counter_sources: List[Tuple[str, Callable]] = []  # (prefix, reference to the source)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float, nbytes: int = 0, error: bool = False):
+        with self._lock:
+            timings = self.endpoints.setdefault(endpoint, EndpointTimings())
+            timings.count += 1
+            timings.errors += int(error)
+            timings.bytes += nbytes
+            timings.total += seconds
+            timings.max = max(timings.max, seconds)
+            timings.histogram[next(i for i, bound in enumerate(BUCKETS) if seconds <= bound)] += 1
+
+    @contextlib.contextmanager
+    def timed(self, endpoint: str) -> Iterator[Span]:
+        span = Span()
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span.error = True
+            raise
+        finally:
+            self.record(endpoint, time.perf_counter() - start, span.bytes, span.error)
+
+    def add_counters(self, prefix: str, source: Callable[[], Dict[str, float]]):
+        """
+        Report `source()`'s counters as "<prefix> <name>". Bound methods are held weakly, so a
+        registered client can still be garbage collected.
+        """
+        ref = weakref.WeakMethod(source) if hasattr(source, "__self__") else (lambda: source)
+        with self._lock:
+            self._counter_sources.append((prefix, ref))
+
+    def counters(self) -> Dict[str, float]:
+        with self._lock:
+            sources = list(self._counter_sources)
+        totals: Dict[str, float] = {}
+        for prefix, ref in sources:
+            source = ref()
+            if source is None:
+                continue
+            for name, value in source().items():
+                totals[f"{prefix} {name}"] = totals.get(f"{prefix} {name}", 0) + value
+        return totals
+
+    def reset(self):
+        with self._lock:
+            self.endpoints.clear()
+
+    def calls(self, prefix: str = "") -> int:
+        """Calls recorded against endpoints starting with `prefix`"""
+        with self._lock:
+            return sum(timings.count for name, timings in self.endpoints.items() if name.startswith(prefix))
+
+    def to_dict(self) -> Dict:
+        counters = self.counters()
+        with self._lock:
+            return {
+                "buckets": [str(bound) for bound in BUCKETS],
+                "endpoints": {name: asdict(timings) for name, timings in self.endpoints.items()},
+                "counters": counters,
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def print_summary(self, console: Optional[Console] = None):
+        console = console or Console(stderr=True)
+        table = Table(header_style="bold", box=None, title="timings")
+        table.add_column("Endpoint", style="cyan")
+        table.add_column("Calls", justify="right")
+        table.add_column("Errors", justify="right", style="red")
+        table.add_column("Bytes", justify="right")
+        table.add_column("Total", justify="right", style="magenta")
+        table.add_column("p50", justify="right")
+        table.add_column("p95", justify="right")
+        table.add_column("Max", justify="right")
+
+        with self._lock:
+            endpoints = sorted(self.endpoints.items(), key=lambda item: item[1].total, reverse=True)
+        for name, timings in endpoints:
+            table.add_row(
+                name,
+                str(timings.count),
+                str(timings.errors or ""),
+                f"{timings.bytes:,}",
+                f"{timings.total:.3f}s",
+                f"{timings.percentile(0.5):.3f}s",
+                f"{timings.percentile(0.95):.3f}s",
+                f"{timings.max:.3f}s",
+            )
+        console.print(table)
+
+        counters = {name: value for name, value in self.counters().items() if value}
+        if counters:
+            table = Table(header_style="bold", box=None, title="counters")
+            table.add_column("Counter", style="cyan")
+            table.add_column("Value", justify="right")
+            for name, value in counters.items():
+                table.add_row(name, f"{value:.3f}s" if isinstance(value, float) else str(value))
+            console.print(table)
+
+
+TIMINGS = Timings()
+
+
+def timed(endpoint: str):
+    """Time a block against the process-wide registry, e.g. `with timed("GET jobs") as span:`"""
+    return TIMINGS.timed(endpoint)
+
+
+def endpoint_name(method: str, path: str) -> str:
+    """Collapse IDs and names in a path so e.g. every jobs/<id> lands in one bucket"""
+    path = BEAKER_ID.sub("{id}", path)
+    if path.startswith("users/"):
+        path = "users/{name}"
+    return f"{method} {path}"
+
+
+def with_timings(main: Callable) -> Callable:
+    """
+    Give a console script the global --timings flag: `--timings` prints a summary table to
+    stderr on exit, `--timings=json` prints the same data as JSON.
+    """
+    @functools.wraps(main)
+    def wrapper(*args, **kwargs):
+        mode = None
+        for arg in list(sys.argv[1:]):
+            if arg in ("--timings", "--timings=table", "--timings=json"):
+                mode = arg.partition("=")[2] or "table"
+                sys.argv.remove(arg)
+        try:
+            return main(*args, **kwargs)
+        finally:
+            if mode == "json":
+                print(TIMINGS.to_json(), file=sys.stderr)
+            elif mode == "table":
+                TIMINGS.print_summary()
+
+    return wrapper
@@ -10,6 +10,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from scripts.get_free_gpus import get_free_gpus
 from scripts.get_jobs import get_job_data
 
+from cuvette.utils.timings import with_timings
+
 logging.basicConfig(
     filename="/tmp/widget.log",
     level=logging.DEBUG,
@@ -147,6 +149,7 @@ class GPUMonitorApp(rumps.App):
             self.menu.add(rumps.MenuItem(f"Error: {str(e)}"))
 
 
+@with_timings
 def main():
     if sys.version_info >= (3, 11):
         raise RuntimeError("Widget requires Python <= 3.10 or lower due to rumps / _tkinter compatibility")